@@ -0,0 +1,472 @@
+"""Async (ASGI) front end for the /encrypt and /decrypt endpoints.
+
+Same API as server.py, served by uvicorn:
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+
+Uploads are parsed as they arrive and streamed straight to the job's temp
+directory, so a slow mobile upload only costs an idle coroutine and request
+bodies are never held in memory in full. The CPU-heavy work (frame
+extraction, borders, LSB, decoding) runs in a bounded process pool, so
+hundreds of slow uploads can't starve the workers that are processing video.
+"""
+import asyncio
+import base64
+import functools
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.utils import secure_filename
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from core import (
+    StegoConfig,
+    request_config,
+    generate_keys,
+    load_previews,
+    encode_video,
+    decode_video_file,
+    decode_video_segmented,
+    request_profiler,
+    should_profile,
+    ResumableUploadError,
+    upload_status_headers,
+    upload_error_body,
+    create_upload,
+    upload_status,
+    open_chunk,
+    finalize_upload,
+    resolve_upload,
+    delete_upload,
+)
+
+# Form fields are tiny (the text is RSA-encrypted), anything bigger is abuse
+MAX_FIELD_SIZE = 64 * 1024
+
+config = StegoConfig.from_env()
+
+
+class UploadError(Exception):
+    """Malformed or oversized multipart upload"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StreamingUpload:
+    """Incremental multipart parser that writes the video part to disk.
+
+    Parser callbacks only queue work; ``feed`` then applies the queued file
+    operations in a worker thread, so the event loop never blocks on disk.
+    """
+
+    def __init__(self, boundary, upload_dir, file_field='video'):
+        self.upload_dir = upload_dir
+        self.file_field = file_field
+        self.fields = {}
+        self.filename = None
+        self.video_path = None
+        self._file = None
+        self._ops = []
+        self._headers = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+        self._parser = MultipartParser(boundary, callbacks={
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        })
+
+    async def feed(self, chunk):
+        self._parser.write(chunk)
+        await self._flush()
+
+    async def finish(self):
+        self._parser.finalize()
+        await self._flush()
+
+    async def abort(self):
+        """Close the output file after a failed upload"""
+        self._ops.append(('close', None))
+        await self._flush()
+
+    async def _flush(self):
+        if self._ops:
+            ops, self._ops = self._ops, []
+            await run_in_threadpool(self._apply, ops)
+
+    def _apply(self, ops):
+        for op, value in ops:
+            if op == 'open':
+                self._file = open(value, 'wb')
+            elif op == 'write':
+                self._file.write(value)
+            elif op == 'close' and self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        self._part_name = options.get(b'name', b'').decode('utf-8', 'replace')
+        if self._part_name == self.file_field and b'filename' in options:
+            if self.video_path is not None:
+                raise UploadError("Only one video per request")
+            self.filename = options[b'filename'].decode('utf-8', 'replace')
+            self._part_is_file = True
+            if self.filename:
+                self.video_path = os.path.join(self.upload_dir, secure_filename(self.filename) or 'upload')
+                self._ops.append(('open', self.video_path))
+
+    def _on_part_data(self, data, start, end):
+        if self._part_is_file:
+            if self.video_path is not None:
+                self._ops.append(('write', bytes(data[start:end])))
+        elif self._part_name is not None:
+            self._field_value += data[start:end]
+            if len(self._field_value) > MAX_FIELD_SIZE:
+                raise UploadError(f"Field {self._part_name} is too large", 413)
+
+    def _on_part_end(self):
+        if self._part_is_file:
+            self._ops.append(('close', None))
+        elif self._part_name:
+            self.fields[self._part_name] = self._field_value.decode('utf-8', 'replace')
+
+
+class FormFields:
+    """A urlencoded request: fields only, the video comes from upload_id"""
+    filename = None
+    video_path = None
+
+    def __init__(self, fields):
+        self.fields = fields
+
+
+async def receive_upload(request, upload_dir):
+    """Stream a multipart request body into upload_dir"""
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type == b'application/x-www-form-urlencoded':
+        # Nothing to stream, but keep the body as small as the fields allow
+        if int(request.headers.get('content-length') or 0) > MAX_FIELD_SIZE:
+            raise UploadError("Form is too large", 413)
+        form = await request.form()
+        if any(len(value) > MAX_FIELD_SIZE for value in form.values()):
+            raise UploadError("Form is too large", 413)
+        return FormFields(dict(form))
+    boundary = options.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise UploadError("Expected a multipart/form-data or urlencoded form")
+
+    upload = StreamingUpload(boundary, upload_dir)
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await upload.feed(chunk)
+        await upload.finish()
+    except Exception:
+        await upload.abort()
+        raise
+    return upload
+
+
+# CPU-bound jobs; these run in the process pool so they must be module level
+# Profiling happens here, in the worker process, where the work actually runs
+def _encode_job(video_path, text, temp_dir, job_config, profile=False):
+    with request_profiler(job_config, 'encrypt', profile) as profiler:
+        profiler.note_video(video_path)
+        mp4_path = encode_video(video_path, text, temp_dir, job_config)
+    if not mp4_path or not os.path.exists(mp4_path):
+        return {"error": "MP4 conversion failed"}, 500
+    with open(mp4_path, 'rb') as mp4_file:
+        mp4_data = mp4_file.read()
+    return {
+        "mp4": base64.b64encode(mp4_data).decode('utf-8'),
+        "mp4_filename": os.path.basename(mp4_path),
+        # Thumbnail, sprite sheet and sprite layout, if they were asked for
+        **load_previews(temp_dir),
+    }, 200
+
+def _decode_job(video_path, temp_dir, job_config, profile=False):
+    with request_profiler(job_config, 'decrypt', profile) as profiler:
+        profiler.note_video(video_path)
+        # Full mode checks every frame in parallel segments and reports splices
+        if job_config.full_verify:
+            response_data = decode_video_segmented(video_path, temp_dir, job_config)
+        else:
+            response_data = decode_video_file(video_path, temp_dir, job_config)
+    if response_data:
+        return response_data, 200
+    return {"error": "No hidden text found in video"}, 404
+
+
+async def request_video(upload):
+    """Path of this request's video: a finalized upload or the streamed file"""
+    if upload.fields.get('upload_id'):
+        return await run_in_threadpool(resolve_upload, upload.fields['upload_id'], config)
+    return upload.video_path
+
+def _missing_video(upload):
+    """Error response when the request has neither a video nor an upload_id"""
+    if upload.fields.get('upload_id'):
+        return None
+    if upload.filename is None:
+        return JSONResponse({"error": "Missing video file"}, 400)
+    if upload.filename == '':
+        return JSONResponse({"error": "No video selected"}, 400)
+    return None
+
+async def run_cpu_job(app, func, *args):
+    """Run a CPU-bound job in the process pool, waiting for a free slot"""
+    async with app.state.cpu_slots:
+        loop = asyncio.get_running_loop()
+        executor = app.state.executor
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args))
+        except BrokenProcessPool:
+            # A worker died (OOM, a crash in OpenCV); the pool is unusable from
+            # now on, so replace it for later requests. Jobs that were running
+            # in it fail; the first of them to get here swaps the pool.
+            if app.state.executor is executor:
+                print("[ERROR] A CPU worker process died, restarting the pool")
+                app.state.executor = ProcessPoolExecutor(max_workers=config.worker_count())
+                executor.shutdown(wait=False)
+            raise RuntimeError("The worker processing this video died, please retry")
+
+def _new_temp_dir():
+    temp_dir = os.path.join(config.temp_folder, str(uuid.uuid4()))
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
+
+async def encrypt_endpoint(request):
+    """Endpoint to encrypt text and hide it in video"""
+    temp_dir = await run_in_threadpool(_new_temp_dir)
+    try:
+        upload = await receive_upload(request, temp_dir)
+        if 'text' not in upload.fields:
+            return JSONResponse({"error": "Missing video file or text"}, 400)
+        error = _missing_video(upload)
+        if error is not None:
+            return error
+        video_path = await request_video(upload)
+
+        # Per-job options: border, speed, previews, preview_format
+        try:
+            job_config = request_config(config, upload.fields)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, 400)
+
+        body, status = await run_cpu_job(request.app, _encode_job, video_path,
+                                         upload.fields['text'], temp_dir, job_config,
+                                         should_profile(config, request.headers))
+        return JSONResponse(body, status)
+    except UploadError as e:
+        return JSONResponse({"error": str(e)}, e.status_code)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+    finally:
+        await run_in_threadpool(shutil.rmtree, temp_dir, True)
+
+async def decrypt_endpoint(request):
+    """Endpoint to decrypt hidden text from video"""
+    temp_dir = await run_in_threadpool(_new_temp_dir)
+    try:
+        upload = await receive_upload(request, temp_dir)
+        error = _missing_video(upload)
+        if error is not None:
+            return error
+        # mode=full checks every frame in parallel segments and reports splices
+        try:
+            job_config = request_config(config, upload.fields)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, 400)
+        video_path = await request_video(upload)
+
+        body, status = await run_cpu_job(request.app, _decode_job, video_path,
+                                         temp_dir, job_config, should_profile(config, request.headers))
+        return JSONResponse(body, status)
+    except UploadError as e:
+        return JSONResponse({"error": str(e)}, e.status_code)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+    finally:
+        await run_in_threadpool(shutil.rmtree, temp_dir, True)
+
+
+def upload_error_response(error):
+    """JSON error for the upload protocol, with the offset to resume from"""
+    body, headers = upload_error_body(error)
+    return JSONResponse(body, error.status_code, headers=headers)
+
+def upload_status_response(status, code=200):
+    return JSONResponse(status, code, headers=upload_status_headers(status))
+
+async def _upload_fields(request):
+    """JSON or form fields of a small upload-protocol request"""
+    if request.headers.get('content-type', '').startswith('application/json'):
+        try:
+            return await request.json()
+        except ValueError:
+            return {}
+    return await request.form()
+
+
+# Resumable uploads: create, PATCH chunks at the current offset, finalize,
+# then pass upload_id to /encrypt or /decrypt instead of a video file
+async def create_upload_endpoint(request):
+    """Start a resumable upload"""
+    fields = await _upload_fields(request)
+    try:
+        status = await run_in_threadpool(create_upload, fields.get('filename'), fields.get('length'),
+                                         fields.get('sha256'), config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    return upload_status_response(status, 201)
+
+async def upload_status_endpoint(request):
+    """Offset to resume from (HEAD gets just the headers)"""
+    try:
+        status = await run_in_threadpool(upload_status, request.path_params['upload_id'], config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    return upload_status_response(status)
+
+async def append_upload_endpoint(request):
+    """Append the request body at the Upload-Offset header's offset"""
+    upload_id = request.path_params['upload_id']
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return JSONResponse({"error": "Missing or invalid Upload-Offset header"}, 400)
+
+    # Check the offset and take the upload's lock before reading the body,
+    # then stream it to disk block by block. If the client drops mid-chunk,
+    # the bytes that did arrive are kept.
+    try:
+        writer = await run_in_threadpool(open_chunk, upload_id, offset, config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    disconnected = False
+    try:
+        try:
+            async for data in request.stream():
+                if data:
+                    await run_in_threadpool(writer.write, data)
+        except ClientDisconnect:
+            disconnected = True
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    finally:
+        await run_in_threadpool(writer.close)
+    if disconnected:
+        return Response(status_code=400)
+    try:
+        status = await run_in_threadpool(upload_status, upload_id, config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    return upload_status_response(status)
+
+async def finalize_upload_endpoint(request):
+    """Verify the assembled file against its length and SHA-256"""
+    fields = await _upload_fields(request)
+    try:
+        status = await run_in_threadpool(finalize_upload, request.path_params['upload_id'],
+                                         fields.get('sha256'), config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    return upload_status_response(status)
+
+async def delete_upload_endpoint(request):
+    """Discard an upload"""
+    try:
+        await run_in_threadpool(delete_upload, request.path_params['upload_id'], config)
+    except ResumableUploadError as e:
+        return upload_error_response(e)
+    return Response(status_code=204)
+
+
+async def startup():
+    config.ensure_dirs()
+    generate_keys(config=config)
+    workers = config.worker_count()
+    # Each worker process gets its share of the cores as its CPU budget, so
+    # ffmpeg encodes in different workers don't oversubscribe the machine
+    config.cpu_budget = config.per_worker_budget(workers)
+    app.state.executor = ProcessPoolExecutor(max_workers=workers)
+    # Let a few jobs queue behind the busy workers, hold the rest back
+    app.state.cpu_slots = asyncio.Semaphore(workers * 2)
+    print(f"[INFO] Async server using {workers} CPU worker processes, "
+          f"{config.cpu_budget} threads each")
+
+async def shutdown():
+    app.state.executor.shutdown(wait=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/encrypt', encrypt_endpoint, methods=['POST']),
+        Route('/decrypt', decrypt_endpoint, methods=['POST']),
+        Route('/uploads', create_upload_endpoint, methods=['POST']),
+        Route('/uploads/{upload_id}', upload_status_endpoint, methods=['GET', 'HEAD']),
+        Route('/uploads/{upload_id}', append_upload_endpoint, methods=['PATCH']),
+        Route('/uploads/{upload_id}', delete_upload_endpoint, methods=['DELETE']),
+        Route('/uploads/{upload_id}/finalize', finalize_upload_endpoint, methods=['POST']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_credentials=True,
+                   allow_headers=['Content-Type', 'Authorization', 'X-Stego-Profile', 'Upload-Offset'],
+                   allow_methods=['GET', 'HEAD', 'PUT', 'PATCH', 'POST', 'DELETE', 'OPTIONS'],
+                   expose_headers=['Upload-Offset', 'Upload-Length']),
+    ],
+    on_startup=[startup],
+    on_shutdown=[shutdown],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
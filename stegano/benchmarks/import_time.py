@@ -0,0 +1,78 @@
+"""Measure cold import time of the core package and the web layer.
+
+Each module is imported in a fresh interpreter so nothing is cached between
+runs. The script exits non-zero when an import exceeds its budget or when
+``core`` drags in one of the heavy dependencies it is supposed to load lazily.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --core-budget-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STEGANO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported as a side effect of ``import core``
+HEAVY_MODULES = ['cv2', 'numpy', 'stegano', 'cryptography', 'flask_cors']
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+'''
+
+
+def measure(module, runs):
+    """Import a module in fresh interpreters and return the timings in ms"""
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            cwd=STEGANO_DIR,
+        )
+        result = json.loads(output)
+        timings.append(result["ms"])
+        loaded = result["modules"]
+    return timings, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--core-budget-ms', type=float, default=50.0)
+    parser.add_argument('--server-budget-ms', type=float, default=500.0)
+    parser.add_argument('--skip-server', action='store_true',
+                        help="Only measure core (e.g. when Flask isn't installed)")
+    args = parser.parse_args()
+
+    budgets = [('core', args.core_budget_ms)]
+    if not args.skip_server:
+        budgets.append(('server', args.server_budget_ms))
+
+    failed = False
+    for module, budget in budgets:
+        timings, loaded = measure(module, args.runs)
+        median = statistics.median(timings)
+        status = "OK" if median <= budget else "OVER BUDGET"
+        print(f"[INFO] import {module}: median {median:.1f} ms "
+              f"(min {min(timings):.1f}, max {max(timings):.1f}, budget {budget:.0f} ms) {status}")
+        if median > budget:
+            failed = True
+
+        if module == 'core':
+            leaked = [name for name in HEAVY_MODULES if name in loaded]
+            if leaked:
+                print(f"[ERROR] import core eagerly loaded: {', '.join(leaked)}")
+                failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Local load generator for the /encrypt and /decrypt endpoints.
+
+Drives a mix of concurrent encrypt and decrypt requests with synthetic clips
+and writes latency percentiles, throughput, error rate and server RSS over
+time to a JSON report. Everything runs on one machine; nothing external is
+contacted.
+
+    # Start the Flask app in this process and load it
+    python benchmarks/loadtest.py --target flask --concurrency 8 --requests 200
+
+    # Same, but with the async server
+    python benchmarks/loadtest.py --target asgi --concurrency 64 --duration 60
+
+    # An already running server; pass its PID to sample its memory
+    python benchmarks/loadtest.py --target http://localhost:5000 --server-pid 1234
+
+With an in-process target the sampled RSS includes the load generator
+itself; worker processes (e.g. the async server's pool) are counted too.
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+STEGANO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, STEGANO_DIR)
+
+
+def make_clip(path, frames, width, height, fps=30, seed=0):
+    """Write a synthetic MP4 clip with moving shapes and some noise"""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for index in range(frames):
+        frame = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        frame[:, :, 0] += np.uint8((index * 3) % 200)
+        center = (int(width / 2 + (width / 4) * np.sin(index / 10)), height // 2)
+        cv2.circle(frame, center, max(height // 8, 4), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def encode_multipart(fields, files):
+    """Build a multipart/form-data body; files maps name -> (filename, bytes)"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode())
+        parts.append(value.encode('utf-8') + b'\r\n')
+    for name, (filename, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode())
+        parts.append(data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+def post(base_url, endpoint, fields, files, timeout):
+    """POST a multipart request; returns (status, parsed JSON or None)"""
+    body, content_type = encode_multipart(fields, files)
+    request = urllib.request.Request(base_url + endpoint, data=body, method='POST',
+                                     headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def rss_kb(pid):
+    """Resident set size of a process and all its descendants, in KiB"""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1])
+                    break
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children') as children:
+                for child in children.read().split():
+                    total += rss_kb(int(child))
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return total
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    # Multiply before dividing so e.g. 95 * 20 / 100 stays exactly 19
+    rank = max(math.ceil(pct * len(sorted_values) / 100) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def summarize(samples, elapsed):
+    """Latency percentiles (ms), throughput and error rate for some samples"""
+    latencies = sorted(sample["ms"] for sample in samples)
+    errors = sum(1 for sample in samples if not sample["ok"])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def start_flask(port):
+    """Serve the Flask app from a background thread"""
+    from werkzeug.serving import make_server
+    from server import app, config
+
+    config.ensure_dirs()
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+def start_asgi(port):
+    """Serve the async app with uvicorn from a background thread"""
+    import uvicorn
+    from asgi_server import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', default='flask',
+                        help="'flask', 'asgi' (in-process) or a base URL such as http://localhost:5000")
+    parser.add_argument('--port', type=int, default=5099, help="Port for in-process targets")
+    parser.add_argument('--server-pid', type=int, help="PID to sample RSS from for URL targets")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=40, help="Total requests (ignored with --duration)")
+    parser.add_argument('--duration', type=float, help="Run for this many seconds instead")
+    parser.add_argument('--encrypt-ratio', type=float, default=0.5,
+                        help="Fraction of requests that go to /encrypt")
+    parser.add_argument('--clips', type=int, default=3, help="Number of distinct synthetic clips")
+    parser.add_argument('--clip-frames', type=int, default=30)
+    parser.add_argument('--clip-size', default='320x240')
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--rss-interval', type=float, default=0.5)
+    parser.add_argument('--output', default='loadtest_report.json')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.clip_size.split('x'))
+    rng = random.Random(args.seed)
+
+    stop_server = None
+    if args.target in ('flask', 'asgi'):
+        stop_server = (start_flask if args.target == 'flask' else start_asgi)(args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+        server_pid = os.getpid()
+    else:
+        base_url = args.target.rstrip('/')
+        server_pid = args.server_pid
+
+    # Synthetic inputs, plus one encoded copy of each for /decrypt
+    clip_dir = tempfile.mkdtemp(prefix='loadtest-')
+    clips = []
+    for index in range(args.clips):
+        path = make_clip(os.path.join(clip_dir, f'clip_{index}.mp4'),
+                         args.clip_frames, width, height, seed=args.seed + index)
+        with open(path, 'rb') as clip_file:
+            clips.append((os.path.basename(path), clip_file.read()))
+
+    print(f"[INFO] Preparing {len(clips)} encoded clips for /decrypt traffic")
+    encoded_clips = []
+    for name, data in clips:
+        status, body = post(base_url, '/encrypt', {'text': 'loadtest'}, {'video': (name, data)}, args.timeout)
+        if status != 200:
+            print(f"[ERROR] Warm-up /encrypt failed with status {status}")
+            return 1
+        encoded_clips.append((body['mp4_filename'], base64.b64decode(body['mp4'])))
+
+    samples = []
+    samples_lock = threading.Lock()
+    rss_samples = []
+    stop_event = threading.Event()
+    budget = {"remaining": args.requests}
+
+    def take_request():
+        with samples_lock:
+            if args.duration is None:
+                if budget["remaining"] <= 0:
+                    return None
+                budget["remaining"] -= 1
+            return 'encrypt' if rng.random() < args.encrypt_ratio else 'decrypt'
+
+    def worker():
+        while not stop_event.is_set():
+            kind = take_request()
+            if kind is None:
+                return
+            if kind == 'encrypt':
+                name, data = rng.choice(clips)
+                fields, files = {'text': f'load {uuid.uuid4().hex[:8]}'}, {'video': (name, data)}
+            else:
+                name, data = rng.choice(encoded_clips)
+                fields, files = {}, {'video': (name, data)}
+            start = time.perf_counter()
+            try:
+                status, _ = post(base_url, f'/{kind}', fields, files, args.timeout)
+            except Exception:
+                status = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with samples_lock:
+                samples.append({"endpoint": kind, "ms": elapsed_ms, "status": status,
+                                "ok": status == 200, "t": time.perf_counter() - run_start})
+
+    def sample_rss():
+        while not stop_event.is_set():
+            rss_samples.append({"t": round(time.perf_counter() - run_start, 3),
+                                "rss_kb": rss_kb(server_pid)})
+            stop_event.wait(args.rss_interval)
+
+    print(f"[INFO] Running against {base_url} with concurrency {args.concurrency}")
+    run_start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    if server_pid:
+        threading.Thread(target=sample_rss, daemon=True).start()
+    for thread in workers:
+        thread.start()
+    if args.duration is not None:
+        time.sleep(args.duration)
+        stop_event.set()
+    for thread in workers:
+        thread.join()
+    stop_event.set()
+    elapsed = time.perf_counter() - run_start
+
+    report = {
+        "target": base_url,
+        "concurrency": args.concurrency,
+        "encrypt_ratio": args.encrypt_ratio,
+        "clip": {"frames": args.clip_frames, "size": args.clip_size, "count": args.clips},
+        "elapsed_s": elapsed,
+        "overall": summarize(samples, elapsed),
+        "endpoints": {
+            kind: summarize([sample for sample in samples if sample["endpoint"] == kind], elapsed)
+            for kind in ('encrypt', 'decrypt')
+        },
+        "rss": rss_samples,
+        "peak_rss_kb": max((sample["rss_kb"] for sample in rss_samples), default=None),
+    }
+    with open(args.output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+
+    shutil.rmtree(clip_dir, ignore_errors=True)
+
+    overall = report["overall"]
+    if not samples:
+        print("[ERROR] No requests completed")
+        return 1
+    print(f"[INFO] {overall['requests']} requests in {elapsed:.1f}s: {overall['throughput_rps']:.2f} req/s, "
+          f"p50 {overall['p50_ms']:.0f} ms, p95 {overall['p95_ms']:.0f} ms, p99 {overall['p99_ms']:.0f} ms, "
+          f"error rate {overall['error_rate']:.1%}")
+    print(f"[INFO] Report written to {args.output}")
+
+    if stop_server:
+        stop_server()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
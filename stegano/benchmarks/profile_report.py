@@ -0,0 +1,77 @@
+"""Aggregate saved request profiles and list the slowest functions.
+
+Reads the ``.prof``/``.json`` pairs written by core.profiling from one or
+more directories, lists the slowest requests with their video metadata and
+merges all profiles to show where the time goes across them.
+
+    python benchmarks/profile_report.py profiles/
+    python benchmarks/profile_report.py profiles/ --label encrypt --min-height 1080 --top 30
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+
+
+def load_profiles(directories, label=None, min_height=0):
+    """Return (prof_path, metadata) pairs that match the filters"""
+    profiles = []
+    for directory in directories:
+        for prof_path in sorted(glob.glob(os.path.join(directory, '*.prof'))):
+            metadata_path = prof_path[:-len('.prof')] + '.json'
+            metadata = {}
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as metadata_file:
+                    metadata = json.load(metadata_file)
+            video = metadata.get("video") or {}
+            if label and metadata.get("label") != label:
+                continue
+            if video.get("height", 0) < min_height:
+                continue
+            profiles.append((prof_path, metadata))
+    return profiles
+
+def describe_video(video):
+    if not video:
+        return "unknown video"
+    return (f"{video.get('width')}x{video.get('height')}, {video.get('frame_count')} frames, "
+            f"{video.get('fps', 0):.2f} fps, {video.get('codec') or '?'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directories', nargs='+')
+    parser.add_argument('--label', help="Only 'encrypt' or 'decrypt' profiles")
+    parser.add_argument('--min-height', type=int, default=0, help="Only videos at least this tall")
+    parser.add_argument('--top', type=int, default=20, help="How many functions to list")
+    parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'])
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.directories, args.label, args.min_height)
+    if not profiles:
+        print("No matching profiles found")
+        return 1
+
+    print(f"Slowest requests ({len(profiles)} profiles):")
+    by_wall_time = sorted(profiles, key=lambda item: item[1].get("wall_seconds", 0), reverse=True)
+    for prof_path, metadata in by_wall_time[:10]:
+        print(f"  {metadata.get('wall_seconds', 0):8.2f}s  {metadata.get('label', '?'):8s} "
+              f"{describe_video(metadata.get('video'))}  {os.path.basename(prof_path)}")
+
+    stats = pstats.Stats(profiles[0][0], stream=io.StringIO())
+    for prof_path, _ in profiles[1:]:
+        stats.add(prof_path)
+    stats.strip_dirs().sort_stats(args.sort)
+
+    output = io.StringIO()
+    stats.stream = output
+    stats.print_stats(args.top)
+    print(f"\nTop {args.top} functions by {args.sort} time across all profiles:")
+    print(output.getvalue())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Round-trip check for payload-only (border=0) smart rendering.
+
+Generates a synthetic H.264 clip, hides a text in it with smart render and
+decodes the result again. The script exits non-zero unless the text comes
+back and the output holds exactly one frame (the metadata frame) more than
+the source.
+
+    python benchmarks/smart_render_check.py
+    python benchmarks/smart_render_check.py --frames 300 --size 1280x720 --keep work/
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+STEGANO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, STEGANO_DIR)
+
+
+def make_h264_clip(path, frames, width, height, fps=30, gop=30):
+    """Write a synthetic H.264 clip with a keyframe every ``gop`` frames"""
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate={fps}',
+        '-frames:v', str(frames),
+        '-c:v', 'libx264', '-g', str(gop), '-pix_fmt', 'yuv420p',
+        path
+    ], check=True)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--size', default='640x360', help="WIDTHxHEIGHT")
+    parser.add_argument('--text', default="smart render round trip")
+    parser.add_argument('--keep', help="Work in this directory and keep it")
+    args = parser.parse_args()
+
+    from core import StegoConfig, count_frames, decode_video_file, encode_video, generate_keys
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix='smart-render-check-')
+    config = StegoConfig(
+        keys_folder=os.path.join(work_dir, 'keys'),
+        temp_folder=os.path.join(work_dir, 'tmp'),
+        upload_folder=os.path.join(work_dir, 'uploads'),
+        border=False,
+        smart_render=True,
+    )
+    try:
+        config.ensure_dirs()
+        generate_keys(config=config)
+        width, height = (int(value) for value in args.size.split('x'))
+        clip = make_h264_clip(os.path.join(work_dir, 'clip.mp4'), args.frames, width, height)
+
+        start = time.perf_counter()
+        try:
+            mp4_path = encode_video(clip, args.text, os.path.join(work_dir, 'encode'), config)
+        except ValueError as e:
+            print(f"[ERROR] Smart render failed: {e}")
+            return 1
+        elapsed = time.perf_counter() - start
+        decoded = decode_video_file(mp4_path, os.path.join(work_dir, 'decode'), config)
+        frames = count_frames(mp4_path)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"[INFO] Encoded {args.frames} frames in {elapsed:.2f}s; output has {frames} frames, "
+          f"decoded {decoded.get('stego_data')!r}")
+    if decoded.get('stego_data') != args.text:
+        print("[ERROR] The hidden text did not survive the smart render")
+        return 1
+    if frames != args.frames + 1:
+        print(f"[ERROR] Expected {args.frames + 1} frames")
+        return 1
+    print("[INFO] OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
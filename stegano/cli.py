@@ -0,0 +1,282 @@
+"""Offline batch tool for encoding and verifying directories of videos.
+
+Runs the same core pipeline as the HTTP endpoints, without uploads:
+
+    python cli.py encode --text "hello" --output-dir out/ videos/
+    python cli.py encode --manifest jobs.jsonl --output-dir out/
+    python cli.py verify out/ --log verify.jsonl
+    python cli.py add-key
+
+Inputs can be video files, directories (scanned recursively) or manifests.
+A manifest is either JSONL with one {"path": ..., "text": ...} object per
+line, or plain text with one path per line. Relative paths in a manifest are
+resolved against the manifest's directory.
+
+Every processed file is appended to a JSONL result log. Re-running the same
+command skips files the log already records as "ok", so an interrupted batch
+can simply be started again.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from core import (
+    SPEED_TIERS,
+    StegoConfig,
+    add_key,
+    count_frames,
+    encode_video,
+    decode_video_file,
+    decode_video_segmented,
+    generate_keys,
+    read_preview_manifest,
+)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.avi', '.mkv', '.webm')
+
+
+def iter_manifest(manifest_path):
+    """Yield (path, text) pairs from a JSONL or plain-text manifest"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                entry = json.loads(line)
+                path, text = entry['path'], entry.get('text')
+            else:
+                path, text = line, None
+            yield os.path.join(base_dir, path), text
+
+def collect_jobs(inputs, manifests, default_text=None):
+    """Build the ordered job list as (path, text, relative_dir) tuples"""
+    jobs = []
+    seen = set()
+
+    def add(path, text, rel_dir=''):
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            jobs.append((path, text if text is not None else default_text, rel_dir))
+
+    for manifest_path in manifests:
+        for path, text in iter_manifest(manifest_path):
+            add(path, text)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(VIDEO_EXTENSIONS):
+                        rel_dir = os.path.relpath(root, item)
+                        add(os.path.join(root, name), None, '' if rel_dir == '.' else rel_dir)
+        else:
+            add(item, None)
+
+    return jobs
+
+def output_name(path, rel_dir=''):
+    """Where encode puts a file's result, relative to the output directory"""
+    stem = os.path.basename(path).rsplit('.', 1)[0]
+    return os.path.normpath(os.path.join(rel_dir, f"encoded_{stem}.mp4"))
+
+def find_output_collisions(jobs):
+    """Groups of input paths that would be encoded to the same output file"""
+    targets = {}
+    for path, _, rel_dir in jobs:
+        targets.setdefault(output_name(path, rel_dir), []).append(path)
+    return [paths for paths in targets.values() if len(paths) > 1]
+
+def load_completed(log_path, command):
+    """Return the set of paths the log already records as done for this command"""
+    completed = set()
+    if not os.path.isfile(log_path):
+        return completed
+    with open(log_path, 'r', encoding='utf-8') as log_file:
+        for line in log_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get('command') == command and record.get('status') == 'ok':
+                completed.add(record['path'])
+    return completed
+
+def _encode_job(job):
+    """Pool worker: encode one file into the output directory"""
+    path, text, rel_dir, output_dir, config = job
+    work_dir = os.path.join(config.temp_folder, f"cli-{uuid.uuid4()}")
+    record = {"command": "encode", "path": path}
+    start = time.perf_counter()
+    try:
+        if not text:
+            raise ValueError("No text given for this file")
+        record["frames"] = count_frames(path)
+        mp4_path = encode_video(path, text, work_dir, config)
+        if not mp4_path or not os.path.exists(mp4_path):
+            raise RuntimeError("MP4 conversion failed")
+        # The name main() checked for collisions
+        output_path = os.path.join(output_dir, output_name(path, rel_dir))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        shutil.move(mp4_path, output_path)
+        record.update(status="ok", output=output_path)
+        # Previews go next to the video as <name>_thumbnail.jpg / <name>_sprite.jpg
+        previews = read_preview_manifest(work_dir)
+        for name in ('thumbnail', 'sprite'):
+            if name in previews:
+                preview_path = f"{output_path.rsplit('.', 1)[0]}_{previews[name]}"
+                shutil.move(os.path.join(work_dir, previews[name]), preview_path)
+                record[name] = preview_path
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+def _verify_job(job):
+    """Pool worker: decode one file and record what was found"""
+    path, _, _, _, config = job
+    work_dir = os.path.join(config.temp_folder, f"cli-{uuid.uuid4()}")
+    record = {"command": "verify", "path": path}
+    start = time.perf_counter()
+    try:
+        record["frames"] = count_frames(path)
+        if config.full_verify:
+            result = decode_video_segmented(path, work_dir, config)
+        else:
+            result = decode_video_file(path, work_dir, config)
+        record.update(status="ok", found=bool(result.get("stego_data")), **result)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+def run(command, jobs, log_path, workers, output_dir, config):
+    """Process jobs with a worker pool, appending each result to the log"""
+    completed = load_completed(log_path, command)
+    pending = [job for job in jobs if job[0] not in completed]
+    skipped = len(jobs) - len(pending)
+    print(f"[INFO] {len(pending)} files to {command}, {skipped} already done according to {log_path}")
+    if not pending:
+        return 0
+
+    worker = _encode_job if command == 'encode' else _verify_job
+    tasks = [(path, text, rel_dir, output_dir, config) for path, text, rel_dir in pending]
+
+    done = errors = frames = 0
+    start = time.perf_counter()
+    log_dir = os.path.dirname(os.path.abspath(log_path))
+    os.makedirs(log_dir, exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as log_file, \
+            multiprocessing.Pool(workers) as pool:
+        for record in pool.imap_unordered(worker, tasks):
+            log_file.write(json.dumps(record) + '\n')
+            log_file.flush()
+            done += 1
+            frames += record.get("frames", 0)
+            if record["status"] != "ok":
+                errors += 1
+                print(f"[ERROR] {record['path']}: {record['error']}")
+            else:
+                print(f"[INFO] [{done}/{len(tasks)}] {record['path']} ({record['seconds']}s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] Processed {done} files ({errors} errors) in {elapsed:.1f}s: "
+          f"{done / elapsed:.2f} files/s, {frames / elapsed:.1f} frames/s")
+    return 1 if errors else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch encode or verify videos offline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(sub):
+        sub.add_argument('inputs', nargs='*', help="Video files or directories")
+        sub.add_argument('--manifest', action='append', default=[],
+                         help="JSONL or plain-text list of videos (repeatable)")
+        sub.add_argument('--log', help="JSONL result log used for resuming")
+        sub.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        sub.add_argument('--frame-spool', action='store_true',
+                         help="Spool frames in a memory-mapped file instead of PNGs")
+        sub.add_argument('--speed', choices=[tier.name for tier in SPEED_TIERS],
+                         help="x264 speed tier (default: STEGO_SPEED_TIER or balanced)")
+
+    encode = subparsers.add_parser('encode', help="Hide text in videos")
+    add_common(encode)
+    encode.add_argument('--text', help="Text for files without one in the manifest")
+    encode.add_argument('--output-dir', required=True)
+    encode.add_argument('--no-border', action='store_true',
+                        help="Payload-only: skip the visible data border (needs --smart-render)")
+    encode.add_argument('--smart-render', action='store_true',
+                        help="With --no-border, only re-encode the GOPs that change")
+    encode.add_argument('--previews', action='store_true',
+                        help="Also write a thumbnail and a sprite sheet per video")
+
+    verify = subparsers.add_parser('verify', help="Decode and check videos")
+    add_common(verify)
+    verify.add_argument('--full', action='store_true',
+                        help="Check every frame's border and index for splices (segmented decode)")
+
+    new_key = subparsers.add_parser('add-key', help="Create an extra RSA key for key rotation")
+    new_key.add_argument('--key-size', type=int, help="Bits (default: STEGO_KEY_SIZE or 2048)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'add-key':
+        kid = add_key(args.key_size, StegoConfig.from_env())
+        print(f"[INFO] Set STEGO_ACTIVE_KEY={kid} to encrypt new payloads with it")
+        return 0
+    if not args.inputs and not args.manifest:
+        parser.error("give at least one input path or --manifest")
+    jobs = collect_jobs(args.inputs, args.manifest, getattr(args, 'text', None))
+    if args.command == 'encode':
+        missing = [path for path, text, _ in jobs if not text]
+        if missing:
+            parser.error(f"--text is required: {len(missing)} files have no text in a manifest "
+                         f"(first: {missing[0]})")
+        # Outputs are named encoded_<stem>.mp4, so x.mov and x.mp4, or x.mp4
+        # from two directories, would overwrite each other
+        collisions = find_output_collisions(jobs)
+        if collisions:
+            parser.error(f"{len(collisions)} outputs would be written by more than one input, "
+                         f"e.g. {' and '.join(collisions[0])}; rename them or encode them separately")
+
+    config = StegoConfig.from_env()
+    if args.frame_spool:
+        config.frame_spool = True
+    if getattr(args, 'no_border', False):
+        config.border = False
+    if getattr(args, 'smart_render', False):
+        config.smart_render = True
+    if args.command == 'encode' and not config.border and not config.smart_render:
+        parser.error("--no-border needs --smart-render (or STEGO_SMART_RENDER=1): "
+                     "a full render doesn't keep the payload")
+    if getattr(args, 'full', False):
+        config.full_verify = True
+    if getattr(args, 'previews', False):
+        config.previews = True
+    if args.speed:
+        config.speed_tier = args.speed
+    # Split the cores between the worker processes
+    workers = max(args.workers, 1)
+    config.cpu_budget = config.per_worker_budget(workers)
+    config.ensure_dirs()
+    # Generate keys once up front so workers don't race to create them
+    generate_keys(config=config)
+
+    output_dir = os.path.abspath(args.output_dir) if args.command == 'encode' else None
+    log_path = args.log or os.path.join(output_dir or '.', f"{args.command}_results.jsonl")
+    return run(args.command, jobs, log_path, workers, output_dir, config)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
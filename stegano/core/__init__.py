@@ -0,0 +1,64 @@
+"""Importable steganography core shared by the server, the CLI and the benchmarks.
+
+Importing this package is cheap and side-effect free: OpenCV, NumPy, stegano
+and cryptography are only imported inside the functions that need them, and
+no directories are created until a job runs.
+"""
+from .config import StegoConfig, default_config, request_config
+from .crypto import generate_keys, add_key, encrypt_rsa, decrypt_rsa
+from .keyring import Keyring, key_id, load_keyring
+from .ffmpeg import (
+    convert_to_mp4,
+    probe_video_packets,
+    read_parameter_sets,
+    probe_colour,
+    encode_raw_frames,
+    stream_copy_segment,
+    remux_annexb,
+    concat_segments,
+)
+from .spool import FrameSpool, is_spool
+from .scheduler import SPEED_TIERS, SpeedTier, CpuBudget, cpu_budget, get_speed_tier
+from .border import (
+    text_to_binary,
+    binary_to_text,
+    create_data_border,
+    create_data_corners,
+    add_data_border_to_frames,
+    detect_border_in_frame,
+    decode_corner_data,
+    decode_border_data,
+    extract_border_data,
+    pick_border_text,
+)
+from .video import (
+    extract_frames,
+    encode_frames,
+    create_output_video,
+    decode_video,
+    count_frames,
+    load_frame,
+    hide_in_frame,
+    reveal_video_frame,
+    locate_frame_offset,
+)
+from .chunker import lsb_capacity, chunk_payload, parse_chunk, join_chunks
+from .smart_render import smart_encode_video
+from .preview import PREVIEW_FORMATS, build_previews, build_video_previews, read_preview_manifest, load_previews
+from .profiling import PROFILE_HEADER, RequestProfiler, request_profiler, should_profile, video_metadata
+from .uploads import (
+    ResumableUploadError,
+    upload_status_headers,
+    upload_error_body,
+    create_upload,
+    upload_status,
+    ChunkWriter,
+    open_chunk,
+    append_chunk,
+    finalize_upload,
+    resolve_upload,
+    delete_upload,
+    purge_expired_uploads,
+)
+from .segmented import plan_segments, scan_segment, find_splices, decode_video_segmented
+from .pipeline import encode_video, decode_video_file
@@ -0,0 +1,459 @@
+"""Visible data border and corner markers drawn around video frames."""
+import os
+import colorsys
+
+from .spool import is_spool
+
+# Largest frame count the 16-bit corner words can describe
+CORNER_INDEX_LIMIT = 0xFFFF
+
+
+def text_to_binary(text):
+    """Convert text to binary string"""
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return ''.join(format(byte, '08b') for byte in text)
+
+def binary_to_text(binary):
+    """Convert binary string to text with basic error handling"""
+    if not binary or len(binary) < 8:
+        return ""
+        
+    # Make sure binary string length is a multiple of 8
+    binary = binary.ljust((len(binary) // 8 + 1) * 8, '0')
+    
+    # Group into bytes
+    bytes_list = [binary[i:i+8] for i in range(0, len(binary), 8)]
+    
+    # Convert each byte to a character
+    text = ""
+    for byte in bytes_list:
+        try:
+            # Convert binary to integer, then to character
+            char_code = int(byte, 2)
+            # Only keep printable ASCII characters
+            if 32 <= char_code <= 126:
+                text += chr(char_code)
+        except ValueError:
+            pass
+    
+    return text
+
+def create_data_border(frame, data, frame_index, total_frames, border_width=20):
+    """Create border that encodes data in the top-left corner while adding decorative elements elsewhere"""
+    import cv2
+    import numpy as np
+
+    # Make a copy to avoid modifying the original
+    bordered_frame = frame.copy()
+    height, width = bordered_frame.shape[:2]
+    
+    # Convert data to binary
+    binary_data = text_to_binary(data)
+    
+    # Calculate which portion of the data to encode in this frame
+    bits_per_frame = min(len(binary_data), (2 * (width + height) - 4 * border_width) // 2)
+    start_index = (frame_index * bits_per_frame // 3) % len(binary_data)  # Overlap by 2/3 for redundancy
+    
+    # Extract the portion of data for this frame
+    frame_data = binary_data[start_index:start_index + bits_per_frame]
+    if len(frame_data) < bits_per_frame:
+        frame_data += binary_data[:bits_per_frame - len(frame_data)]  # Wrap around
+    
+    # Generate colors for 0 and 1 bits
+    # Use frame index to create subtle color variations between frames
+    hue_shift = (frame_index / total_frames) * 0.3  # Shift hue by up to 0.3
+    
+    # Color for '0' bit - dark blue to purple range
+    zero_hue = (0.6 + hue_shift) % 1.0
+    zero_color = tuple(int(x * 255) for x in colorsys.hsv_to_rgb(zero_hue, 0.7, 0.4))
+    zero_color = (zero_color[2], zero_color[1], zero_color[0])  # Convert to BGR
+    
+    # Color for '1' bit - orange to red range
+    one_hue = (0.05 + hue_shift) % 1.0
+    one_color = tuple(int(x * 255) for x in colorsys.hsv_to_rgb(one_hue, 0.9, 0.7))
+    one_color = (one_color[2], one_color[1], one_color[0])  # Convert to BGR
+    
+    # Calculate the corner size
+    corner_size = border_width * 2
+    
+    # KEEP EXISTING TOP-LEFT CORNER ENCODING (DON'T MODIFY THIS PART)
+    # Encode data in the top-left corner only
+    data_pos = 0
+    segment_width = 2  # Each bit takes 2 pixels width
+    
+    # Top-left corner area
+    for y in range(corner_size):
+        for x in range(corner_size):
+            if data_pos < len(frame_data):
+                bit = int(frame_data[data_pos])
+                color = one_color if bit else zero_color
+                bordered_frame[y, x] = color
+                data_pos += 1
+    
+    # ADD DECORATIVE CORNERS TO THE OTHER THREE CORNERS
+    # These won't contain actual data but will help with corner detection
+    
+    # Top-right corner (decorative)
+    tr_color = (30, 180, 30)  # Green
+    cv2.rectangle(bordered_frame, (width - corner_size, 0), (width, corner_size), tr_color, -1)
+    # Add diagonal lines for a distinctive pattern
+    for i in range(0, corner_size, 4):
+        cv2.line(bordered_frame, (width - corner_size, i), (width - corner_size + i, 0), (255, 255, 255), 1)
+    
+    # Bottom-left corner (decorative)
+    bl_color = (180, 30, 30)  # Blue
+    cv2.rectangle(bordered_frame, (0, height - corner_size), (corner_size, height), bl_color, -1)
+    # Add circular pattern
+    cv2.circle(bordered_frame, (corner_size // 2, height - corner_size // 2), 
+               corner_size // 3, (255, 255, 255), 2)
+    
+    # Bottom-right corner (decorative)
+    br_color = (180, 180, 30)  # Cyan
+    cv2.rectangle(bordered_frame, (width - corner_size, height - corner_size), (width, height), br_color, -1)
+    # Add square pattern
+    cv2.rectangle(bordered_frame, (width - corner_size + 5, height - corner_size + 5), 
+                 (width - 5, height - 5), (255, 255, 255), 2)
+    
+    # ADD TRANSLUCENT DECORATIVE ELEMENTS TO THE REST OF THE BORDER
+    # This makes it look like there's data without actually encoding anything
+    
+    # Create a border overlay for translucent effects
+    border_overlay = bordered_frame.copy()
+    
+    # Top border (excluding corners)
+    for x in range(corner_size, width - corner_size, segment_width * 2):
+        # Random-looking pattern based on position and frame
+        pattern_value = (x + frame_index) % 8  
+        if pattern_value < 4:  # Create alternating pattern
+            color = (30 + pattern_value * 20, 30 + pattern_value * 10, 150 - pattern_value * 10)
+            cv2.rectangle(border_overlay, (x, 0), (x + segment_width * 2 - 1, border_width - 1), color, -1)
+    
+    # Right border (excluding corners)
+    for y in range(corner_size, height - corner_size, segment_width * 2):
+        pattern_value = (y + frame_index) % 8
+        if pattern_value < 4:
+            color = (30 + pattern_value * 10, 150 - pattern_value * 10, 30 + pattern_value * 20)
+            cv2.rectangle(border_overlay, (width - border_width, y), 
+                         (width - 1, y + segment_width * 2 - 1), color, -1)
+    
+    # Bottom border (excluding corners)
+    for x in range(width - corner_size, corner_size, -(segment_width * 2)):
+        pattern_value = (x + frame_index) % 8
+        if pattern_value < 4:
+            color = (150 - pattern_value * 10, 30 + pattern_value * 10, 30 + pattern_value * 20)
+            cv2.rectangle(border_overlay, (x - segment_width * 2 + 1, height - border_width), 
+                         (x, height - 1), color, -1)
+    
+    # Left border (excluding corners)
+    for y in range(height - corner_size, corner_size, -(segment_width * 2)):
+        pattern_value = (y + frame_index) % 8
+        if pattern_value < 4:
+            color = (30 + pattern_value * 20, 150 - pattern_value * 10, 30 + pattern_value * 10)
+            cv2.rectangle(border_overlay, (0, y - segment_width * 2 + 1), 
+                         (border_width - 1, y), color, -1)
+    
+    # Blend the overlay with the original frame for translucent effect
+    alpha = 0.6  # Translucency level (0.0 to 1.0)
+    # Apply the translucent border overlay to the bordered frame
+    # But preserve the top-left corner which contains actual data
+    
+    # Top border (excluding corners)
+    mask = np.zeros_like(bordered_frame, dtype=bool)
+    mask[0:border_width, corner_size:width-corner_size] = True
+    bordered_frame[mask] = cv2.addWeighted(bordered_frame, 1-alpha, border_overlay, alpha, 0)[mask]
+    
+    # Right border (excluding corners)
+    mask = np.zeros_like(bordered_frame, dtype=bool)
+    mask[corner_size:height-corner_size, width-border_width:width] = True
+    bordered_frame[mask] = cv2.addWeighted(bordered_frame, 1-alpha, border_overlay, alpha, 0)[mask]
+    
+    # Bottom border (excluding corners)
+    mask = np.zeros_like(bordered_frame, dtype=bool)
+    mask[height-border_width:height, corner_size:width-corner_size] = True
+    bordered_frame[mask] = cv2.addWeighted(bordered_frame, 1-alpha, border_overlay, alpha, 0)[mask]
+    
+    # Left border (excluding corners)
+    mask = np.zeros_like(bordered_frame, dtype=bool)
+    mask[corner_size:height-corner_size, 0:border_width] = True
+    bordered_frame[mask] = cv2.addWeighted(bordered_frame, 1-alpha, border_overlay, alpha, 0)[mask]
+    
+    return bordered_frame
+
+def _corner_check(frame_index, total_frames):
+    """16-bit check word that tells a real corner index from stray pixels"""
+    return (frame_index * 40503 + total_frames * 257 + 0x5A5A) & 0xFFFF
+
+def create_data_corners(frame, frame_index, total_frames, border_width=20):
+    """Create corners that encode frame information.
+
+    The top-left corner holds the border data, so the 16-bit frame index goes
+    in the top-right corner, the total frame count in the bottom-left and a
+    check word in the bottom-right, each as a 4x4 grid of white (1) and
+    black (0) dots.
+    """
+    import cv2
+
+    height, width = frame.shape[:2]
+    corner_size = border_width * 2
+    cell = corner_size // 4
+    
+    if total_frames > CORNER_INDEX_LIMIT:
+        raise ValueError(f"Corner index only holds {CORNER_INDEX_LIMIT} frames, got {total_frames}")
+    words = [frame_index, total_frames, _corner_check(frame_index, total_frames)]
+    
+    # Same background colors as the decorative corners
+    corner_colors = [
+        (30, 180, 30),   # Top-right: Green
+        (180, 30, 30),   # Bottom-left: Blue
+        (180, 180, 30)   # Bottom-right: Cyan
+    ]
+    
+    # Corner positions
+    corners = [
+        (width - corner_size, 0),          # Top-right
+        (0, height - corner_size),         # Bottom-left
+        (width - corner_size, height - corner_size)  # Bottom-right
+    ]
+    
+    for (x, y), color, word in zip(corners, corner_colors, words):
+        # Fill corner background
+        cv2.rectangle(frame, (x, y), (x + corner_size - 1, y + corner_size - 1), color, -1)
+        
+        for bit_idx, bit in enumerate(format(word, '016b')):
+            # Dot in the middle of its 4x4 grid cell
+            px = x + (bit_idx % 4) * cell + cell // 2
+            py = y + (bit_idx // 4) * cell + cell // 2
+            # Draw white dot for 1, black dot for 0
+            dot_color = (255, 255, 255) if bit == '1' else (0, 0, 0)
+            cv2.circle(frame, (px, py), corner_size // 10, dot_color, -1)
+    
+    return frame
+
+def add_data_border_to_frames(frames, data, temp_dir, border_width=20):
+    """Add data-encoding border to all frames.
+
+    PNG frames are written to new ``bordered_*.png`` files; a FrameSpool is
+    updated in place and returned as is.
+    """
+    import cv2
+
+    spooled = is_spool(frames)
+    bordered_frames = frames if spooled else []
+    
+    # Get total frame count
+    total_frames = len(frames)
+    
+    # Prepare the data to encode with STEGO marker
+    full_data = f"STEGO:{data}"
+    print(f"[INFO] Encoding data in border: {full_data[:50]}...")
+    # A 16-bit index would wrap on longer clips and point the decoder at the
+    # wrong frames, so those go without one
+    stamp_index = total_frames <= CORNER_INDEX_LIMIT
+    if not stamp_index:
+        print(f"[WARNING] {total_frames} frames is too many for the corner index, leaving it out")
+    
+    # Process each frame
+    for i in range(total_frames):
+        # Read frame
+        frame = frames[i] if spooled else cv2.imread(frames[i])
+        if frame is None:
+            continue
+        
+        # Create border with encoded data in top-left corner only
+        bordered_frame = create_data_border(frame, full_data, i, total_frames, border_width)
+        # Stamp the frame's index so a decoder can find the payload frames
+        # even after the video was trimmed or remuxed
+        if stamp_index:
+            create_data_corners(bordered_frame, i, total_frames, border_width)
+        
+        # Save the bordered frame
+        if spooled:
+            frames[i] = bordered_frame
+            continue
+        bordered_path = os.path.join(temp_dir, f"bordered_{i}.png")
+        cv2.imwrite(bordered_path, bordered_frame)
+        bordered_frames.append(bordered_path)
+        
+        # Log progress
+        if i % 10 == 0:
+            print(f"[INFO] Added data border to frame {i}/{total_frames}")
+    
+    print(f"[INFO] Added data borders to all {len(bordered_frames)} frames")
+    return bordered_frames
+
+def detect_border_in_frame(frame):
+    """Detect if a frame has our specific encoding pattern in the top-left corner"""
+    import numpy as np
+
+    # Get frame dimensions
+    height, width = frame.shape[:2]
+    border_width = 20
+    corner_size = border_width * 2
+    
+    # Check if corners exist
+    if width < corner_size or height < corner_size:
+        return False
+    
+    # Extract the top-left corner
+    top_left = frame[0:corner_size, 0:corner_size]
+    
+    # Check for distinctive color patterns specific to our encoding
+    avg_colors = np.mean(top_left, axis=(0, 1))
+    color_std = np.std(top_left, axis=(0, 1))
+    
+    # Our encoding should have:
+    # 1. Significant color variance (mix of 0 and 1 bits)
+    # 2. Strong red or blue components (our bit colors)
+    high_variance = np.mean(color_std) > 50
+    strong_color = np.max(avg_colors) > 100
+    
+    # Also check for the presence of other corner markers
+    # Top-right corner should be green
+    if width >= corner_size*2:
+        top_right = frame[0:corner_size, width-corner_size:width]
+        tr_color = np.mean(top_right, axis=(0, 1))
+        tr_green = tr_color[1] > tr_color[0] + 30 and tr_color[1] > tr_color[2] + 30
+    else:
+        tr_green = False
+    
+    # Either the top-left corner looks like our encoding or we also have the top-right marker
+    return (high_variance and strong_color) or tr_green
+
+def _read_corner_word(corner_roi):
+    """Read a 4x4 dot grid as a 16-bit word from the mean of each dot's centre"""
+    cell = corner_roi.shape[0] // 4
+    grid = corner_roi[:cell * 4, :cell * 4].reshape(4, cell, 4, cell, -1)
+    # Average only the middle of each cell so compression smear at the dot
+    # edges doesn't matter
+    inner = slice(cell // 3, cell - cell // 3)
+    levels = grid[:, inner, :, inner].mean(axis=(1, 3, 4)).ravel()
+    return int(''.join('1' if level > 127 else '0' for level in levels), 2)
+
+def decode_corner_data(frame, border_width=20):
+    """Decode frame index and total frames from corner markers.
+
+    Returns ``(frame_index, total_frames)``, or None when the frame carries
+    no valid corner index.
+    """
+    height, width = frame.shape[:2]
+    corner_size = border_width * 2
+    if width < corner_size * 2 or height < corner_size * 2:
+        return None
+    
+    frame_index = _read_corner_word(frame[0:corner_size, width - corner_size:width])
+    total_frames = _read_corner_word(frame[height - corner_size:height, 0:corner_size])
+    check = _read_corner_word(frame[height - corner_size:height, width - corner_size:width])
+    
+    if check != _corner_check(frame_index, total_frames) or frame_index >= max(total_frames, 1):
+        return None
+    return frame_index, total_frames
+
+def decode_border_data(frame, border_width=20):
+    """Decode data from the top-left corner only, since that's where we encode it"""
+    # Get frame dimensions
+    height, width = frame.shape[:2]
+    corner_size = border_width * 2
+    
+    # Make sure the frame is large enough
+    if width < corner_size or height < corner_size:
+        return None
+    
+    # Extract the top-left corner
+    top_left = frame[0:corner_size, 0:corner_size]
+    
+    # Function to determine if a pixel is likely a '1' bit based on color
+    def is_one_bit(pixel):
+        # Simple RGB check - typically our 1-bits are orange/red
+        # which have high red values compared to blue
+        return pixel[2] > pixel[0] + 20
+    
+    # Extract bits from the top-left corner, row by row
+    extracted_bits = ""
+    for y in range(corner_size):
+        for x in range(corner_size):
+            pixel = top_left[y, x]
+            extracted_bits += '1' if is_one_bit(pixel) else '0'
+    
+    # Convert binary data to text
+    print(f"[INFO] Extracted {len(extracted_bits)} bits from corner")
+    extracted_text = binary_to_text(extracted_bits)
+    return extracted_text
+
+def extract_border_data(video_path, temp_dir, corner_samples=None, border_width=20):
+    """Extract data from the top-left corner of frames.
+
+    If ``corner_samples`` is a list, every sampled frame with a valid corner
+    index is appended to it as (frame index, original index, total frames),
+    so the decoder can locate the payload without reading frames again.
+    """
+    import cv2
+
+    # Create a temporary directory
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir)
+    
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    # Sample frames throughout the video
+    samples = min(10, frame_count)  # Use fewer samples for quicker processing
+    sample_indices = [int(i * frame_count / samples) for i in range(samples)]
+    
+    print(f"[INFO] Sampling {samples} frames to extract border data")
+    
+    # Collect raw frame data
+    raw_frames = []
+    for frame_idx in sample_indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = cap.read()
+        if ret:
+            if corner_samples is not None:
+                located = decode_corner_data(frame, border_width)
+                if located is not None:
+                    corner_samples.append((frame_idx,) + located)
+            # Check if the frame has our border encoding
+            if detect_border_in_frame(frame):
+                raw_frames.append((frame_idx, frame))
+    
+    cap.release()
+    
+    if not raw_frames:
+        return "No frames with border encoding found"
+    
+    # Extract texts from each frame
+    frame_texts = []
+    for idx, frame in raw_frames:
+        text = decode_border_data(frame)
+        if text:
+            frame_texts.append((idx, text))
+            print(f"[INFO] Frame {idx}: {text[:30]}...")
+    
+    if not frame_texts:
+        return "No decodable border data found"
+    return pick_border_text(frame_texts)
+
+def pick_border_text(frame_texts):
+    """Best border text from (frame index, decoded text) pairs"""
+    # Look for "STEGO:" pattern
+    stego_fragments = []
+    for idx, text in frame_texts:
+        if "STEGO:" in text:
+            start = text.find("STEGO:")
+            # Get a generous chunk after the STEGO marker
+            end = min(start + 200, len(text))
+            fragment = text[start:end]
+            # Keep only text characters
+            clean_fragment = ''.join(c for c in fragment if c.isprintable())
+            stego_fragments.append(clean_fragment)
+    
+    if stego_fragments:
+        # Return the longest clean fragment
+        longest = max(stego_fragments, key=len)
+        return longest
+    
+    # If no STEGO pattern, return concatenated text from all frames
+    combined = " ".join(text for _, text in frame_texts)
+    # Remove non-printable characters 
+    clean_combined = ''.join(c for c in combined if c.isprintable())
+    return clean_combined
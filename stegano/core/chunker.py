@@ -0,0 +1,73 @@
+"""Capacity-aware packing of the encrypted payload into LSB frames.
+
+Each chunk carries a small ``<seq>/<total>|`` header so the decoder knows how
+many chunks to expect and can stop as soon as it has them all. Chunks are
+sized from what a frame of the given resolution can actually hold, so the
+payload lands in the fewest frames possible (usually just one).
+"""
+import math
+import re
+
+_CHUNK_HEADER = re.compile(r'^(\d+)/(\d+)\|')
+
+
+def lsb_capacity(width, height):
+    """Return how many 8-bit characters stegano's LSB hide fits in one frame.
+
+    stegano stores ``"<length>:" + message`` at 3 bits per pixel, so the
+    length prefix is subtracted from the raw ``3 * w * h / 8`` characters.
+    """
+    raw_chars = (3 * width * height) // 8
+    capacity = raw_chars - len(str(raw_chars)) - 1
+    return max(capacity, 0)
+
+def chunk_header(seq, total):
+    return f"{seq}/{total}|"
+
+def chunk_payload(payload, capacity, max_chunks=None):
+    """Split payload into the fewest chunks that fit ``capacity`` characters each.
+
+    Every chunk starts with its ``seq/total|`` header. Raises ValueError if
+    the payload would need more than ``max_chunks`` frames.
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8')
+    if not payload:
+        raise ValueError("Payload is empty")
+
+    # The header grows with the number of chunks, so settle the count first
+    total = 1
+    while True:
+        room = capacity - len(chunk_header(total - 1, total))
+        if room <= 0:
+            raise ValueError(f"Frames are too small to hold any payload (capacity {capacity})")
+        needed = math.ceil(len(payload) / room)
+        if needed <= total:
+            break
+        total = needed
+
+    if max_chunks is not None and total > max_chunks:
+        raise ValueError(f"Payload needs {total} frames but the video only has {max_chunks}")
+
+    room = math.ceil(len(payload) / total)
+    return [chunk_header(seq, total) + payload[seq * room:(seq + 1) * room]
+            for seq in range(total)]
+
+def parse_chunk(message):
+    """Return (seq, total, data) for a chunked message, or None for legacy data"""
+    match = _CHUNK_HEADER.match(message or '')
+    if not match:
+        return None
+    seq, total = int(match.group(1)), int(match.group(2))
+    if total == 0 or seq >= total:
+        return None
+    return seq, total, message[match.end():]
+
+def join_chunks(chunks):
+    """Reassemble the payload from a {seq: data} dict; None if any chunk is missing"""
+    if not chunks:
+        return None
+    total = max(chunks) + 1
+    if any(seq not in chunks for seq in range(total)):
+        return None
+    return ''.join(chunks[seq] for seq in range(total))
@@ -0,0 +1,152 @@
+"""Explicit configuration for the steganography core.
+
+Nothing in the core package touches the filesystem at import time; callers
+build a ``StegoConfig`` (or use ``default_config()``) and the directories are
+only created when a function actually needs them.
+"""
+import os
+from dataclasses import dataclass, replace
+
+
+@dataclass
+class StegoConfig:
+    """Paths and tunables shared by the web layer, the CLI and the benchmarks"""
+    upload_folder: str = './uploads'
+    temp_folder: str = './tmp'
+    keys_folder: str = './keys'
+    key_size: int = 2048
+    # Key ID new payloads are encrypted with (empty = the key_size default key)
+    active_key: str = ''
+    border_width: int = 20
+    # Keep decoded frames in a memory-mapped spool instead of PNG files
+    frame_spool: bool = False
+    # Draw the visible data border; payload-only jobs turn this off
+    border: bool = True
+    # For payload-only jobs, re-encode only the GOPs that contain changed
+    # frames; required for them, as a full render doesn't keep the payload
+    smart_render: bool = False
+    # Also write a poster thumbnail and a sprite-sheet preview when encoding
+    previews: bool = False
+    # 'jpeg' or 'webp'
+    preview_format: str = 'jpeg'
+    # Decode by checking every frame in parallel segments (reports splices)
+    full_verify: bool = False
+    # Workers for segmented full-video decoding (0 = half the CPU budget);
+    # capped by the budget, which is cores / cpu_workers on the async server
+    decode_workers: int = 0
+    # Processes for CPU-bound jobs in the async server (0 = one per core)
+    cpu_workers: int = 0
+    # CPU threads for ffmpeg and frame work (0 = all cores); split between
+    # the worker processes of the async server and the batch CLI
+    cpu_budget: int = 0
+    # Requested x264 speed tier: 'quality', 'balanced' or 'fast'
+    speed_tier: str = 'balanced'
+    # Seconds before an unused resumable upload is deleted (0 = keep forever)
+    upload_ttl: int = 24 * 60 * 60
+    # Largest length a resumable upload may declare, in bytes
+    max_upload_size: int = 2 * 1024 ** 3
+    # Where per-request profiles go; profiling is off while this is empty
+    profile_dir: str = ''
+    # Profile every request, not just those asking for it with a header
+    profile_all: bool = False
+    # 'production' disables header-triggered profiling
+    environment: str = 'development'
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Build a config from STEGO_* environment variables"""
+        environ = os.environ if environ is None else environ
+        defaults = cls()
+        return cls(
+            upload_folder=environ.get('STEGO_UPLOAD_FOLDER', defaults.upload_folder),
+            temp_folder=environ.get('STEGO_TEMP_FOLDER', defaults.temp_folder),
+            keys_folder=environ.get('STEGO_KEYS_FOLDER', defaults.keys_folder),
+            key_size=int(environ.get('STEGO_KEY_SIZE', defaults.key_size)),
+            active_key=environ.get('STEGO_ACTIVE_KEY', defaults.active_key),
+            border_width=int(environ.get('STEGO_BORDER_WIDTH', defaults.border_width)),
+            frame_spool=_env_flag(environ.get('STEGO_FRAME_SPOOL'), defaults.frame_spool),
+            border=_env_flag(environ.get('STEGO_BORDER'), defaults.border),
+            smart_render=_env_flag(environ.get('STEGO_SMART_RENDER'), defaults.smart_render),
+            previews=_env_flag(environ.get('STEGO_PREVIEWS'), defaults.previews),
+            preview_format=environ.get('STEGO_PREVIEW_FORMAT', defaults.preview_format),
+            full_verify=_env_flag(environ.get('STEGO_FULL_VERIFY'), defaults.full_verify),
+            decode_workers=int(environ.get('STEGO_DECODE_WORKERS', defaults.decode_workers)),
+            cpu_workers=int(environ.get('STEGO_CPU_WORKERS', defaults.cpu_workers)),
+            cpu_budget=int(environ.get('STEGO_CPU_BUDGET', defaults.cpu_budget)),
+            speed_tier=environ.get('STEGO_SPEED_TIER', defaults.speed_tier),
+            upload_ttl=int(environ.get('STEGO_UPLOAD_TTL', defaults.upload_ttl)),
+            max_upload_size=int(environ.get('STEGO_MAX_UPLOAD_SIZE', defaults.max_upload_size)),
+            profile_dir=environ.get('STEGO_PROFILE_DIR', defaults.profile_dir),
+            profile_all=_env_flag(environ.get('STEGO_PROFILE'), defaults.profile_all),
+            environment=environ.get('STEGO_ENV', defaults.environment),
+        )
+
+    def worker_count(self):
+        """Number of CPU worker processes to run"""
+        return self.cpu_workers if self.cpu_workers > 0 else (os.cpu_count() or 1)
+
+    def per_worker_budget(self, workers):
+        """CPU budget for each of ``workers`` processes sharing this machine.
+
+        The configured budget (all cores if unset) is split between them.
+        """
+        total = self.cpu_budget or os.cpu_count() or 1
+        return max(total // max(workers, 1), 1)
+
+    def ensure_dirs(self):
+        """Create the working directories if they don't exist"""
+        for folder in (self.upload_folder, self.temp_folder, self.keys_folder):
+            os.makedirs(folder, exist_ok=True)
+
+
+def _env_flag(value, default):
+    """Parse a boolean environment variable"""
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def request_config(config, fields):
+    """Copy of ``config`` with the per-job options of an HTTP form applied.
+
+    Both servers call this with their form fields:
+
+    * ``border=0`` makes a payload-only job, which needs smart render;
+    * ``speed=quality|balanced|fast`` picks the x264 tier the CPU budget aims for;
+    * ``previews=1`` adds a poster thumbnail and a sprite sheet, in
+      ``preview_format`` (jpeg or webp);
+    * ``mode=full`` checks every frame when decoding, ``mode=fast`` doesn't.
+
+    Raises ValueError for an invalid ``speed`` or ``preview_format``, or
+    ``border=0`` while smart render is off.
+    """
+    from .preview import PREVIEW_FORMATS
+    from .scheduler import get_speed_tier
+
+    changes = {}
+    if fields.get('border') is not None:
+        changes['border'] = _env_flag(fields['border'], config.border)
+        if not changes['border'] and not config.smart_render:
+            raise ValueError("border=0 needs smart render, which is off on this server")
+    if fields.get('speed') is not None:
+        changes['speed_tier'] = get_speed_tier(fields['speed']).name
+    if fields.get('previews') is not None:
+        changes['previews'] = _env_flag(fields['previews'], config.previews)
+    if fields.get('preview_format') is not None:
+        if fields['preview_format'] not in PREVIEW_FORMATS:
+            raise ValueError(f"preview_format must be one of {', '.join(PREVIEW_FORMATS)}")
+        changes['preview_format'] = fields['preview_format']
+    if fields.get('mode') is not None:
+        changes['full_verify'] = fields['mode'] == 'full'
+    return replace(config, **changes) if changes else config
+
+
+_default_config = None
+
+
+def default_config():
+    """Return the process-wide config, built from the environment on first use"""
+    global _default_config
+    if _default_config is None:
+        _default_config = StegoConfig.from_env()
+    return _default_config
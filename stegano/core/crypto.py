@@ -0,0 +1,130 @@
+"""RSA helpers used to encrypt the payload before it is hidden in frames."""
+import os
+import base64
+
+from .config import default_config
+from .keyring import key_id, load_keyring
+
+
+def _oaep_padding():
+    from cryptography.hazmat.primitives.asymmetric import padding as rsa_padding
+    from cryptography.hazmat.primitives import hashes
+
+    return rsa_padding.OAEP(
+        mgf=rsa_padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None
+    )
+
+
+# RSA encryption and decryption functions
+def generate_keys(key_size=None, config=None):
+    """Generate RSA key pair if they don't exist"""
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    config = config or default_config()
+    key_size = key_size or config.key_size
+    os.makedirs(config.keys_folder, exist_ok=True)
+    private_keys_path = os.path.join(config.keys_folder, f'private_key_{key_size}.pem')
+    public_keys_path = os.path.join(config.keys_folder, f'public_key_{key_size}.pem')
+    
+    if os.path.isfile(private_keys_path) and os.path.isfile(public_keys_path):
+        print("Public and private keys already exist")
+        return
+    
+    # Generate a private key
+    private_key = rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size,
+    )
+    _write_key_pair(private_key, private_keys_path, public_keys_path)
+    
+    print(f"Public and Private keys created with size {key_size}")
+
+def _write_key_pair(private_key, private_keys_path, public_keys_path):
+    """Save a private key and its public key as PEM files"""
+    from cryptography.hazmat.primitives import serialization
+
+    # Serialize and save the private key
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    
+    with open(private_keys_path, "wb") as file_obj:
+        file_obj.write(private_pem)
+    
+    # Serialize and save the public key
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    
+    with open(public_keys_path, "wb") as file_obj:
+        file_obj.write(public_pem)
+
+def add_key(key_size=None, config=None):
+    """Generate an extra key pair for rotation and return its key ID.
+
+    The files are named after the key ID. Set STEGO_ACTIVE_KEY to the ID to
+    encrypt with the new key; payloads under older keys still decrypt.
+    """
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    config = config or default_config()
+    key_size = key_size or config.key_size
+    os.makedirs(config.keys_folder, exist_ok=True)
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    kid = key_id(private_key.public_key())
+    _write_key_pair(private_key,
+                    os.path.join(config.keys_folder, f'private_key_{kid}.pem'),
+                    os.path.join(config.keys_folder, f'public_key_{kid}.pem'))
+    print(f"Created {key_size}-bit key {kid}")
+    return kid
+
+def encrypt_rsa(message, config=None):
+    """Encrypt message using RSA, prefixed with the key ID as ``kid:base64``"""
+    config = config or default_config()
+    # Ensure keys exist
+    generate_keys(config.key_size, config)
+    
+    kid, private_key = load_keyring(config).active(config.active_key)
+    
+    # Encrypt the message
+    message_bytes = message.encode('utf-8') if isinstance(message, str) else message
+    ciphertext = private_key.public_key().encrypt(message_bytes, _oaep_padding())
+    
+    # Encode in base64 behind the key ID
+    return kid.encode('ascii') + b':' + base64.b64encode(ciphertext)
+
+def decrypt_rsa(encoded_message, config=None):
+    """Decrypt message using RSA, with the key named by its ``kid:`` prefix"""
+    config = config or default_config()
+    # Ensure keys exist
+    generate_keys(config.key_size, config)
+    keyring = load_keyring(config)
+    
+    # Decode base64 if needed
+    if isinstance(encoded_message, str):
+        encoded_message = encoded_message.encode('utf-8')
+    
+    # ':' never occurs in base64, so a prefix can't be confused with data
+    if b':' in encoded_message:
+        kid, encoded_message = encoded_message.split(b':', 1)
+        kid = kid.decode('ascii', 'replace')
+        private_key = keyring.get(kid)
+        if private_key is None:
+            raise ValueError(f"Unknown key ID {kid}")
+    else:
+        # Payloads from before key IDs were all encrypted with the default key
+        private_key = keyring.get(keyring.default_id)
+        if private_key is None:
+            raise ValueError("No default key to decrypt an unprefixed payload")
+    
+    cipher_text = base64.b64decode(encoded_message)
+    
+    # Decrypt the message
+    plain_text = private_key.decrypt(cipher_text, _oaep_padding())
+    
+    return plain_text
@@ -0,0 +1,297 @@
+"""Thin wrappers around the ffmpeg command line."""
+import os
+import re
+import subprocess
+
+from .config import default_config
+from .scheduler import cpu_budget
+
+# H.264 matrix_coefficients (ISO/IEC 23091-2) by ffmpeg colour space name
+MATRIX_COEFFICIENTS = {
+    'gbr': 0, 'bt709': 1, 'unknown': 2, 'fcc': 4, 'bt470bg': 5, 'smpte170m': 6,
+    'smpte240m': 7, 'ycgco': 8, 'bt2020nc': 9, 'bt2020c': 10,
+}
+
+
+def convert_to_mp4(mov_path, output_dir, config=None):
+    """Convert MOV file to MP4 using ffmpeg"""
+    config = config or default_config()
+    # Create the output path with .mp4 extension
+    mp4_path = mov_path.rsplit('.', 1)[0] + '.mp4'
+    
+    try:
+        # The CPU budget queues this launch while the machine is saturated
+        # and picks the speed tier (preset, CRF, threads) it can afford
+        with cpu_budget(config).reserve_encoder(config.speed_tier) as tier:
+            # Use ffmpeg to convert from MOV to MP4
+            # -c:v libx264 uses H.264 codec for video
+            # -crf/-preset come from the speed tier
+            # -threads caps decoder and encoder threads to the reservation
+            # -c:a aac uses AAC codec for audio
+            # -b:a 128k sets audio bitrate
+            command = [
+                'ffmpeg',
+                '-threads', str(tier.threads),
+                '-i', mov_path,
+                '-c:v', 'libx264',
+                '-crf', str(tier.crf),
+                '-preset', tier.preset,
+                '-threads', str(tier.threads),
+                '-c:a', 'aac',
+                '-b:a', '128k',
+                mp4_path
+            ]
+            
+            # Execute the command
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            stdout, stderr = process.communicate()
+        
+        if process.returncode != 0:
+            print(f"Error converting video: {stderr.decode()}")
+            return None
+        
+        print(f"Successfully converted {mov_path} to {mp4_path}")
+        return mp4_path
+    except Exception as e:
+        print(f"Error during conversion: {str(e)}")
+        return None
+
+def probe_video_packets(video_path, config=None):
+    """Return codec, size, time base and display-ordered video packets.
+
+    Uses ffmpeg's framecrc muxer so only the ffmpeg binary is required.
+    Each packet is a (pts, duration, is_keyframe) tuple; list position is the
+    frame index OpenCV would report for the same frame.
+    """
+    config = config or default_config()
+    try:
+        with cpu_budget(config).reserve() as threads:
+            command = [
+                'ffmpeg', '-v', 'error',
+                '-i', video_path,
+                '-map', '0:v:0', '-c', 'copy',
+                '-threads', str(threads),
+                '-f', 'framecrc', '-'
+            ]
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        # No ffmpeg binary; callers fall back to OpenCV or a full render
+        print(f"Error probing video: {e}")
+        return None
+    if process.returncode != 0:
+        print(f"Error probing video: {process.stderr.decode()}")
+        return None
+
+    info = {"codec": None, "width": 0, "height": 0, "time_base": (1, 1), "packets": []}
+    for line in process.stdout.decode().splitlines():
+        if line.startswith('#tb 0:'):
+            num, den = line.split(':', 1)[1].strip().split('/')
+            info["time_base"] = (int(num), int(den))
+        elif line.startswith('#codec_id 0:'):
+            info["codec"] = line.split(':', 1)[1].strip()
+        elif line.startswith('#dimensions 0:'):
+            width, height = line.split(':', 1)[1].strip().split('x')
+            info["width"], info["height"] = int(width), int(height)
+        elif line and not line.startswith('#'):
+            fields = [field.strip() for field in line.split(',')]
+            # Packets without an F= field carry only the keyframe flag
+            flags = next((int(field[2:], 16) for field in fields[6:] if field.startswith('F=')), 1)
+            info["packets"].append((int(fields[2]), int(fields[3]), bool(flags & 1)))
+
+    info["packets"].sort(key=lambda packet: packet[0])
+    return info
+
+def read_parameter_sets(video_path, config=None):
+    """Return the H.264 SPS and PPS of a video's first frame as sorted byte tuples.
+
+    Two streams can only be joined with a plain stream copy when these match
+    byte for byte: they carry the profile, level, chroma format, bit depth
+    and every other setting the decoder is initialised with.
+    """
+    config = config or default_config()
+    try:
+        with cpu_budget(config).reserve() as threads:
+            command = [
+                'ffmpeg', '-v', 'error',
+                '-i', video_path,
+                '-map', '0:v:0', '-c', 'copy',
+                '-bsf:v', 'h264_mp4toannexb',
+                '-frames:v', '1',
+                '-threads', str(threads),
+                '-f', 'h264', '-'
+            ]
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        print(f"Error reading parameter sets: {e}")
+        return None
+    if process.returncode != 0:
+        print(f"Error reading parameter sets: {process.stderr.decode()}")
+        return None
+
+    sps, pps = set(), set()
+    # NAL units follow 00 00 01 start codes; trailing zero bytes belong to the
+    # next start code
+    for nal in process.stdout.split(b'\x00\x00\x01')[1:]:
+        nal = nal.rstrip(b'\x00')
+        if not nal:
+            continue
+        nal_type = nal[0] & 0x1F
+        if nal_type == 7:
+            sps.add(nal)
+        elif nal_type == 8:
+            pps.add(nal)
+    return tuple(sorted(sps)), tuple(sorted(pps))
+
+def probe_colour(video_path, config=None):
+    """Return the (matrix_coefficients, full_range) the first frame decodes with.
+
+    None when ffmpeg can't tell or reports a colour space we have no code for.
+    """
+    config = config or default_config()
+    try:
+        with cpu_budget(config).reserve() as threads:
+            command = [
+                'ffmpeg', '-v', 'info', '-threads', str(threads),
+                '-i', video_path,
+                '-map', '0:v:0', '-frames:v', '1',
+                '-vf', 'showinfo', '-f', 'null', '-'
+            ]
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        print(f"Error probing colour: {e}")
+        return None
+    match = re.search(r'color_range:(\S+) color_space:(\S+)', process.stderr.decode(errors='replace'))
+    if process.returncode != 0 or not match or match.group(2) not in MATRIX_COEFFICIENTS:
+        return None
+    return MATRIX_COEFFICIENTS[match.group(2)], match.group(1) == 'pc'
+
+def remux_annexb(video_path, output_path, config=None, colour=None):
+    """Copy an H.264 stream as Annex-B, with SPS/PPS in front of every keyframe.
+
+    The container follows the output extension (``.ts`` for MPEG-TS).
+
+    Segments with different parameter sets can then be joined: each one
+    brings its own SPS/PPS inside the stream instead of relying on the
+    single set in the MP4 header. ``colour`` (from ``probe_colour``) is
+    written into every SPS: a stream that leaves it out would otherwise
+    decode with whatever colour space the previous segment declared.
+    """
+    config = config or default_config()
+    bitstream_filters = 'h264_mp4toannexb'
+    if colour is not None:
+        bitstream_filters += (f',h264_metadata=matrix_coefficients={colour[0]}'
+                              f':video_full_range_flag={int(colour[1])}')
+    with cpu_budget(config).reserve() as threads:
+        command = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-i', video_path,
+            '-map', '0:v:0', '-c', 'copy',
+            '-bsf:v', bitstream_filters,
+            '-threads', str(threads),
+            output_path
+        ]
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        print(f"Error remuxing segment: {process.stderr.decode()}")
+        return None
+    return output_path
+
+def encode_raw_frames(frames, width, height, fps, output_path, timescale=None, config=None,
+                      lossless=False):
+    """Encode BGR frames to an H.264 MP4 by piping raw video into ffmpeg.
+
+    ``lossless`` keeps every BGR value bit-exact (libx264rgb at QP 0), which
+    the LSB payload needs; the usual YUV 4:2:0 encode would wipe it.
+    """
+    config = config or default_config()
+    with cpu_budget(config).reserve_encoder(config.speed_tier) as tier:
+        command = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            '-an',
+        ]
+        if lossless:
+            command += ['-c:v', 'libx264rgb', '-qp', '0']
+        else:
+            command += ['-c:v', 'libx264', '-crf', str(tier.crf)]
+        command += [
+            '-preset', tier.preset,
+            '-threads', str(tier.threads),
+            '-pix_fmt', 'bgr24' if lossless else 'yuv420p',
+        ]
+        if timescale:
+            command += ['-video_track_timescale', str(timescale)]
+        command.append(output_path)
+
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for frame in frames:
+                process.stdin.write(frame.tobytes())
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            print(f"Error encoding frames: {stderr.decode()}")
+            return None
+    return output_path
+
+def stream_copy_segment(video_path, start_seconds, output_path, timescale=None, config=None):
+    """Copy the video stream from a keyframe to the end without re-encoding"""
+    config = config or default_config()
+    with cpu_budget(config).reserve() as threads:
+        command = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-ss', f'{start_seconds:.6f}',
+            '-i', video_path,
+            '-map', '0:v:0', '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            '-threads', str(threads),
+        ]
+        if timescale:
+            command += ['-video_track_timescale', str(timescale)]
+        command.append(output_path)
+
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        print(f"Error copying segment: {process.stderr.decode()}")
+        return None
+    return output_path
+
+def concat_segments(segment_paths, audio_source, output_path, config=None, durations=None):
+    """Join video segments with the concat demuxer and add the source's audio.
+
+    ``durations`` (seconds per segment) pins where each segment ends; without
+    it the demuxer guesses from the container, which for MPEG-TS leaves out
+    the last frame's duration and squeezes that frame at every join.
+    """
+    config = config or default_config()
+    list_path = output_path.rsplit('.', 1)[0] + '_segments.txt'
+    with open(list_path, 'w') as list_file:
+        for index, segment_path in enumerate(segment_paths):
+            escaped = os.path.abspath(segment_path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+            if durations:
+                list_file.write(f"duration {durations[index]:.6f}\n")
+
+    # The audio is re-encoded, so this one does use its thread
+    with cpu_budget(config).reserve() as threads:
+        command = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_source,
+            '-map', '0:v:0', '-map', '1:a?',
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-threads', str(threads),
+            output_path
+        ]
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        print(f"Error joining segments: {process.stderr.decode()}")
+        return None
+    return output_path
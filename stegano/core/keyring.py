@@ -0,0 +1,103 @@
+"""In-memory keyring of every RSA key in the keys folder.
+
+Each key is known by a short ID, the first 8 hex digits of the SHA-256 of its
+DER-encoded public key. ``encrypt_rsa`` writes that ID in front of the
+ciphertext (``<key id>:<base64>``), so ``decrypt_rsa`` picks the right key
+with one dictionary lookup instead of trying every key in turn.
+
+All ``private_key_*.pem`` files are loaded. New encryptions use the key named
+by ``StegoConfig.active_key``, or the default ``private_key_<key_size>.pem``
+when that is empty. Keys are parsed once per process; the folder is re-listed
+on every lookup (a cheap stat) so a key added for rotation is picked up
+without a restart.
+"""
+import glob
+import hashlib
+import os
+import threading
+
+from .config import default_config
+
+KEY_ID_LENGTH = 8
+
+# (keys folder, key size) -> Keyring
+_keyrings = {}
+_keyrings_lock = threading.Lock()
+
+
+def key_id(public_key):
+    """Short fingerprint of a public key"""
+    from cryptography.hazmat.primitives import serialization
+
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()[:KEY_ID_LENGTH]
+
+def _folder_signature(keys_folder):
+    """Names, sizes and mtimes of the private keys, to spot added or changed keys"""
+    signature = []
+    for path in sorted(glob.glob(os.path.join(keys_folder, 'private_key_*.pem'))):
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class Keyring:
+    """Private keys of one keys folder, indexed by key ID"""
+
+    def __init__(self, keys_folder, key_size):
+        self.keys_folder = keys_folder
+        self.key_size = key_size
+        self.signature = None
+        self.keys = {}
+        self.default_id = None
+
+    def refresh(self):
+        """Reload the keys if the folder changed since the last load"""
+        from cryptography.hazmat.primitives import serialization
+
+        signature = _folder_signature(self.keys_folder)
+        if signature == self.signature:
+            return
+        keys = {}
+        default_id = None
+        default_path = os.path.join(self.keys_folder, f'private_key_{self.key_size}.pem')
+        for path, _, _ in signature:
+            with open(path, 'rb') as key_file:
+                private_key = serialization.load_pem_private_key(key_file.read(), password=None)
+            kid = key_id(private_key.public_key())
+            if kid in keys:
+                print(f"[WARNING] {os.path.basename(path)} duplicates key {kid}, ignoring it")
+                continue
+            keys[kid] = private_key
+            if path == default_path:
+                default_id = kid
+        self.keys = keys
+        self.default_id = default_id
+        self.signature = signature
+        print(f"[INFO] Keyring loaded {len(keys)} keys: {', '.join(sorted(keys))}")
+
+    def get(self, kid):
+        """Private key for an ID, or None"""
+        return self.keys.get(kid)
+
+    def active(self, active_key=''):
+        """(key ID, private key) that new payloads are encrypted with"""
+        kid = active_key or self.default_id
+        if kid not in self.keys:
+            raise ValueError(f"Active key {kid!r} is not in {self.keys_folder}")
+        return kid, self.keys[kid]
+
+
+def load_keyring(config=None):
+    """Return the process-wide keyring for config's keys folder, up to date"""
+    config = config or default_config()
+    cache_key = (os.path.abspath(config.keys_folder), config.key_size)
+    with _keyrings_lock:
+        keyring = _keyrings.get(cache_key)
+        if keyring is None:
+            keyring = _keyrings[cache_key] = Keyring(config.keys_folder, config.key_size)
+        keyring.refresh()
+        return keyring
@@ -0,0 +1,97 @@
+"""End-to-end encode and decode jobs built from the core stages.
+
+These are the entry points shared by the Flask routes, the CLI and the
+benchmarks; each job works inside a caller-provided ``work_dir``.
+"""
+import os
+
+from .border import add_data_border_to_frames, extract_border_data
+from .config import default_config
+from .crypto import encrypt_rsa
+from .spool import is_spool
+from .ffmpeg import convert_to_mp4
+from .preview import build_previews, build_video_previews
+from .scheduler import cpu_budget
+from .smart_render import smart_encode_video
+from .video import extract_frames, encode_frames, create_output_video, decode_video, load_frame
+
+
+def encode_video(video_path, text, work_dir, config=None):
+    """Hide text in a video and return the path of the encoded MP4 (or None)"""
+    config = config or default_config()
+    os.makedirs(work_dir, exist_ok=True)
+
+    # Payload-only jobs re-encode only the GOPs they touch, losslessly. The
+    # full render's lossy MP4 wipes the LSB payload, and with no border
+    # either it would have nothing left to decode, so there's no fallback
+    if not config.border:
+        mp4_path = smart_encode_video(video_path, text, work_dir, config) if config.smart_render else None
+        if not mp4_path:
+            raise ValueError("A payload-only (border=0) encode needs smart render and an H.264 source "
+                             "it can smart-render; the full render would not keep the payload")
+        # Without borders the output looks just like the source
+        if config.previews:
+            _build_previews(build_video_previews, video_path, work_dir, config.preview_format)
+        return mp4_path
+
+    # Frame stages hold one thread of the CPU budget while they run
+    with cpu_budget(config).reserve():
+        # Extract frames from video FIRST
+        frames, _ = extract_frames(video_path, work_dir, spool=config.frame_spool)
+
+        try:
+            # Add data-encoding borders BEFORE steganography
+            if config.border:
+                frames = add_data_border_to_frames(frames, text, work_dir, config.border_width)
+
+            # Encrypt the text using RSA AFTER borders
+            encrypted_text = encrypt_rsa(text, config)
+
+            # Encode encrypted text into frames LAST
+            encode_frames(frames, encrypted_text, work_dir)
+
+            # Previews come from the frames already decoded; the metadata
+            # frame at the end is left out
+            if config.previews:
+                _build_previews(build_previews, lambda index: load_frame(frames, index),
+                                len(frames) - 1, work_dir, config.preview_format)
+
+            # Create output video with .mov extension
+            base_name = os.path.basename(video_path).rsplit('.', 1)[0]
+            output_path = os.path.join(work_dir, f"encoded_{base_name}.mov")
+            create_output_video(frames, video_path, output_path)
+        finally:
+            if is_spool(frames):
+                frames.close()
+
+    # Convert MOV to MP4
+    return convert_to_mp4(output_path, work_dir, config)
+
+def _build_previews(builder, *args):
+    """Previews are an extra; failing to build them never fails the encode"""
+    try:
+        builder(*args)
+    except Exception as e:
+        print(f"[WARNING] Could not build previews: {e}")
+
+def decode_video_file(video_path, work_dir, config=None):
+    """Recover border data and the decrypted payload from a video"""
+    config = config or default_config()
+    os.makedirs(work_dir, exist_ok=True)
+
+    with cpu_budget(config).reserve():
+        # First try to extract data from borders; the same sampled frames
+        # give the corner index that locates the payload
+        corner_samples = []
+        border_data = extract_border_data(video_path, work_dir, corner_samples, config.border_width)
+
+        # Then try to decode and decrypt hidden text
+        decrypted_text = decode_video(video_path, work_dir, config, border_data=border_data,
+                                      corner_samples=corner_samples)
+
+    result = {}
+    if border_data:
+        result["border_data"] = border_data
+    if decrypted_text:
+        result["stego_data"] = decrypted_text
+    return result
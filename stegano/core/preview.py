@@ -0,0 +1,144 @@
+"""Poster thumbnail and sprite-sheet preview built during encoding.
+
+The feed needs a poster image and a scrubbing preview for every posted
+video. Building them from the frames the encoder already decoded saves the
+client (or another server) a full decode of the MP4 just for that.
+
+``build_previews`` writes ``thumbnail.<ext>`` and ``sprite.<ext>`` into the
+job's work directory, plus ``previews.json`` with the sprite layout;
+``load_previews`` turns those into response fields next to ``mp4``.
+"""
+import base64
+import json
+import os
+
+THUMBNAIL_WIDTH = 480
+SPRITE_TILE_WIDTH = 160
+SPRITE_COLUMNS = 5
+SPRITE_FRAMES = 20
+MANIFEST_NAME = 'previews.json'
+
+_FORMATS = {
+    'jpeg': ('.jpg', 'IMWRITE_JPEG_QUALITY', 80),
+    'webp': ('.webp', 'IMWRITE_WEBP_QUALITY', 75),
+}
+PREVIEW_FORMATS = tuple(_FORMATS)
+
+
+def _resize_to_width(frame, width):
+    import cv2
+
+    height, frame_width = frame.shape[:2]
+    if frame_width <= width:
+        return frame
+    return cv2.resize(frame, (width, max(round(height * width / frame_width), 1)),
+                      interpolation=cv2.INTER_AREA)
+
+def _write_image(image, path_base, image_format):
+    """Compress a BGR image and write it; returns the file path"""
+    import cv2
+
+    try:
+        extension, quality_flag, quality = _FORMATS[image_format]
+    except KeyError:
+        raise ValueError(f"Unknown preview format {image_format!r}, expected one of {', '.join(_FORMATS)}")
+    ok, encoded = cv2.imencode(extension, image, [getattr(cv2, quality_flag), quality])
+    if not ok:
+        raise RuntimeError(f"Could not encode {image_format} preview")
+    path = path_base + extension
+    with open(path, 'wb') as image_file:
+        image_file.write(encoded.tobytes())
+    return path
+
+def sample_indices(frame_count, samples):
+    """Evenly spaced frame numbers, at most ``samples`` of them"""
+    samples = max(min(samples, frame_count), 1)
+    return [int(i * frame_count / samples) for i in range(samples)]
+
+def build_previews(read_frame, frame_count, work_dir, image_format='jpeg'):
+    """Write a thumbnail and a sprite sheet for frames ``0..frame_count-1``.
+
+    ``read_frame(index)`` returns a BGR frame (or None). Returns the preview
+    manifest, or None when there are no frames.
+    """
+    import numpy as np
+
+    if frame_count <= 0:
+        return None
+    indices = sample_indices(frame_count, SPRITE_FRAMES)
+    tiles = []
+    used = []
+    for index in indices:
+        frame = read_frame(index)
+        if frame is None:
+            continue
+        tiles.append(_resize_to_width(frame, SPRITE_TILE_WIDTH))
+        used.append(index)
+        # Poster frame: the last sample in the first tenth, past any fade in
+        if len(used) == 1 or index <= frame_count // 10:
+            poster = frame
+    if not tiles:
+        return None
+
+    thumbnail_path = _write_image(_resize_to_width(poster, THUMBNAIL_WIDTH),
+                                  os.path.join(work_dir, 'thumbnail'), image_format)
+
+    # Tiles left to right, top to bottom; the last row is padded with black
+    tile_height, tile_width = tiles[0].shape[:2]
+    columns = min(SPRITE_COLUMNS, len(tiles))
+    rows = -(-len(tiles) // columns)
+    tiles += [np.zeros_like(tiles[0])] * (rows * columns - len(tiles))
+    sheet = np.vstack([np.hstack(tiles[row * columns:(row + 1) * columns]) for row in range(rows)])
+    sprite_path = _write_image(sheet, os.path.join(work_dir, 'sprite'), image_format)
+
+    manifest = {
+        "thumbnail": os.path.basename(thumbnail_path),
+        "sprite": os.path.basename(sprite_path),
+        "sprite_layout": {
+            "columns": columns,
+            "rows": rows,
+            "tile_width": tile_width,
+            "tile_height": tile_height,
+            "frames": used,
+        },
+    }
+    with open(os.path.join(work_dir, MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    print(f"[INFO] Built thumbnail and {len(used)}-frame sprite sheet")
+    return manifest
+
+def build_video_previews(video_path, work_dir, image_format='jpeg'):
+    """Previews read straight from a video file, seeking to each sample"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        def read_frame(index):
+            if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != index:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = cap.read()
+            return frame if ret else None
+
+        return build_previews(read_frame, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), work_dir, image_format)
+    finally:
+        cap.release()
+
+def read_preview_manifest(work_dir):
+    """The manifest build_previews wrote in work_dir, or {} if there is none"""
+    manifest_path = os.path.join(work_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+def load_previews(work_dir):
+    """Response fields for the previews in work_dir (empty if none were built)"""
+    manifest = read_preview_manifest(work_dir)
+    if not manifest:
+        return {}
+    fields = {"sprite_layout": manifest["sprite_layout"]}
+    for name in ('thumbnail', 'sprite'):
+        with open(os.path.join(work_dir, manifest[name]), 'rb') as image_file:
+            fields[name] = base64.b64encode(image_file.read()).decode('utf-8')
+        fields[f"{name}_filename"] = manifest[name]
+    return fields
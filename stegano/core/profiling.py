@@ -0,0 +1,113 @@
+"""Opt-in per-request profiling.
+
+When enabled, a request's processing runs under cProfile and the profile is
+written to ``config.profile_dir`` as ``<name>.prof`` next to ``<name>.json``
+with the video's resolution, frame count, fps and codec, so a pathologically
+slow clip can be matched to where its time went. Use
+``benchmarks/profile_report.py`` to aggregate many saved profiles.
+
+Profiling is enabled for every request with STEGO_PROFILE=1, or per request
+with an ``X-Stego-Profile: 1`` header. The header is ignored when STEGO_ENV
+is ``production``. Nothing is profiled unless STEGO_PROFILE_DIR is set.
+"""
+import json
+import os
+import time
+import uuid
+
+PROFILE_HEADER = 'X-Stego-Profile'
+
+
+def should_profile(config, headers=None):
+    """Decide whether this request gets profiled"""
+    if not config.profile_dir:
+        return False
+    if config.profile_all:
+        return True
+    if config.environment == 'production' or headers is None:
+        return False
+    return headers.get(PROFILE_HEADER, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+def video_metadata(video_path):
+    """Resolution, frame count, fps and codec as reported by OpenCV"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        codec = ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ')
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS),
+            "codec": codec,
+            "size_bytes": os.path.getsize(video_path) if os.path.exists(video_path) else None,
+        }
+    finally:
+        cap.release()
+
+
+class RequestProfiler:
+    """Context manager that profiles a block and dumps the result on exit"""
+
+    def __init__(self, profile_dir, label, enabled=True):
+        self.profile_dir = profile_dir
+        self.label = label
+        self.enabled = enabled
+        self.video_path = None
+        self.extra = {}
+        self._profile = None
+        self._start = None
+
+    def note_video(self, video_path):
+        """Record which video this request processed"""
+        self.video_path = video_path
+
+    def __enter__(self):
+        if self.enabled:
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._start = time.perf_counter()
+            try:
+                self._profile.enable()
+            except Exception as e:
+                # From Python 3.12 only one profiler can run per process, so a
+                # concurrent profiled request runs without one
+                print(f"[WARNING] Not profiling this {self.label} request: {e}")
+                self.enabled = False
+                self._profile = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.enabled:
+            return False
+        self._profile.disable()
+        wall_seconds = time.perf_counter() - self._start
+
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}_{self.label}_{uuid.uuid4().hex[:8]}"
+            profile_path = os.path.join(self.profile_dir, f"{name}.prof")
+            self._profile.dump_stats(profile_path)
+
+            metadata = {
+                "label": self.label,
+                "wall_seconds": wall_seconds,
+                "error": repr(exc) if exc is not None else None,
+                "video": video_metadata(self.video_path) if self.video_path else None,
+                **self.extra,
+            }
+            with open(os.path.join(self.profile_dir, f"{name}.json"), 'w') as metadata_file:
+                json.dump(metadata, metadata_file, indent=2)
+            print(f"[INFO] Profile written to {profile_path} ({wall_seconds:.2f}s)")
+        except Exception as e:
+            # Never fail a request because its profile couldn't be saved
+            print(f"[WARNING] Could not save profile: {e}")
+        return False
+
+
+def request_profiler(config, label, enabled):
+    """Profiler for one request; a no-op unless enabled"""
+    return RequestProfiler(config.profile_dir, label, enabled=enabled)
@@ -0,0 +1,114 @@
+"""CPU budget shared by ffmpeg encodes and frame-processing work.
+
+Left alone, every ffmpeg/libx264 process grabs all cores and competes with
+concurrent requests' OpenCV work, so under load the machine thrashes and p99
+latency collapses. Instead, each process owns a budget of CPU threads
+(``StegoConfig.cpu_budget``, all cores by default):
+
+* frame-processing stages reserve a thread before they run;
+* every ffmpeg launch reserves threads for its encoder, and is queued while
+  the budget is exhausted;
+* the x264 speed tier (preset, CRF, thread count) is picked by the budget:
+  a request asks for a tier and gets it when enough threads are free, or the
+  next faster tier that fits.
+
+Multi-process servers split the cores between their worker processes by
+giving each one a smaller ``cpu_budget``.
+"""
+import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+SpeedTier = namedtuple('SpeedTier', ['name', 'preset', 'crf', 'threads'])
+
+# Slowest (best quality per byte) first
+SPEED_TIERS = [
+    SpeedTier('quality', 'medium', 20, 4),
+    SpeedTier('balanced', 'fast', 23, 2),
+    SpeedTier('fast', 'veryfast', 26, 1),
+]
+_TIERS_BY_NAME = {tier.name: tier for tier in SPEED_TIERS}
+
+
+def get_speed_tier(name):
+    """Look up a tier by name, raising ValueError for unknown names"""
+    try:
+        return _TIERS_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"Unknown speed tier {name!r}, expected one of {', '.join(_TIERS_BY_NAME)}")
+
+
+class CpuBudget:
+    """Counting budget of CPU threads for this process"""
+
+    def __init__(self, total_threads):
+        self.total_threads = max(int(total_threads), 1)
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @property
+    def free_threads(self):
+        return self.total_threads - self._in_use
+
+    def _acquire(self, pick):
+        """Wait until at least one thread is free, then take what pick() grants"""
+        with self._condition:
+            while self.free_threads < 1:
+                self._condition.wait()
+            granted = pick(self.free_threads)
+            self._in_use += granted.threads if isinstance(granted, SpeedTier) else granted
+            return granted
+
+    def _release(self, threads):
+        with self._condition:
+            self._in_use -= threads
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, threads=1):
+        """Reserve up to ``threads`` threads for frame work; yields the grant"""
+        granted = self._acquire(lambda free: min(max(int(threads), 1), free))
+        try:
+            yield granted
+        finally:
+            self._release(granted)
+
+    @contextmanager
+    def reserve_encoder(self, requested='balanced'):
+        """Reserve threads for one ffmpeg encode; yields the SpeedTier to use"""
+        start = SPEED_TIERS.index(get_speed_tier(requested))
+
+        def pick(free):
+            for tier in SPEED_TIERS[start:]:
+                threads = min(tier.threads, self.total_threads)
+                if threads <= free:
+                    return tier._replace(threads=threads)
+            return SPEED_TIERS[-1]._replace(threads=1)
+
+        tier = self._acquire(pick)
+        if tier.name != requested:
+            print(f"[INFO] CPU budget busy, encoding with '{tier.name}' instead of '{requested}'")
+        try:
+            yield tier
+        finally:
+            self._release(tier.threads)
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def cpu_budget(config):
+    """Return the process-wide budget, created from config on first use"""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = CpuBudget(config.cpu_budget or os.cpu_count() or 1)
+            # OpenCV would otherwise start its own thread pool on every core
+            try:
+                import cv2
+                cv2.setNumThreads(1)
+            except ImportError:
+                pass
+        return _budget
@@ -0,0 +1,247 @@
+"""Segmented decoding: whole-video verification spread over several cores.
+
+``decode_video`` only looks at a handful of frames, but full verification
+(checking every frame's border and corner index to find splices) has to
+decode the whole clip, and one ``cv2.VideoCapture`` only uses one core. This
+splits the frame range at keyframes, so each segment can be decoded on its
+own, scans the segments concurrently with independent captures in a worker
+pool and merges the results in frame order:
+
+* the corner index of every frame, checked for jumps (splices, cuts,
+  reordered or foreign frames);
+* which frames carry the data border, plus border text samples;
+* the LSB payload chunks at the start of the video, which are then joined
+  and decrypted as usual.
+
+The pool runs exactly as many workers as it reserved threads from the CPU
+budget, so verification never oversubscribes the cores other jobs are
+encoding on. By default it asks for half the budget, leaving the rest for
+encodes; ``decode_workers`` (``STEGO_DECODE_WORKERS``) asks for more or fewer,
+but never gets more than the budget holds. The trade-off: on the async server
+each worker's budget is the cores divided by ``STEGO_CPU_WORKERS``, so a
+parallel verification there needs fewer workers or a larger
+``STEGO_CPU_BUDGET``, not just a larger ``STEGO_DECODE_WORKERS``.
+"""
+import os
+
+from .border import decode_border_data, decode_corner_data, detect_border_in_frame, pick_border_text
+from .chunker import join_chunks, parse_chunk
+from .config import default_config
+from .crypto import decrypt_rsa
+from .ffmpeg import probe_video_packets
+from .scheduler import cpu_budget
+from .video import count_frames, decode_video, reveal_video_frame
+
+# Decode the border text of every Nth bordered frame; the corner index and
+# border detection still cover every frame
+BORDER_TEXT_EVERY = 10
+# Segments per worker, so a slow segment doesn't leave the others idle
+SEGMENTS_PER_WORKER = 2
+
+
+def plan_segments(video_path, segments, config=None):
+    """Split the frame range into about ``segments`` (start, end) ranges at keyframes.
+
+    Without ffmpeg there are no keyframe positions, so the range is split
+    evenly; OpenCV's seek still lands on the exact frame, just more slowly.
+    """
+    info = probe_video_packets(video_path, config)
+    if info and info["packets"]:
+        frame_count = len(info["packets"])
+        keyframes = [index for index, packet in enumerate(info["packets"]) if packet[2]]
+    else:
+        frame_count = count_frames(video_path)
+        keyframes = None
+    if frame_count <= 0:
+        return []
+
+    target = max(frame_count // max(segments, 1), 1)
+    if keyframes is None:
+        starts = list(range(0, frame_count, target))
+        return list(zip(starts, starts[1:] + [frame_count]))
+    if not keyframes or keyframes[0] != 0:
+        keyframes = [0] + keyframes
+
+    # Greedily close a segment at the first keyframe past each target size
+    starts = [0]
+    for keyframe in keyframes[1:]:
+        if keyframe - starts[-1] >= target:
+            starts.append(keyframe)
+    return list(zip(starts, starts[1:] + [frame_count]))
+
+def scan_segment(video_path, start, end, border_width=20, reveal_payload=False):
+    """Decode frames ``start..end-1`` with a capture of their own.
+
+    Module level so it can run in a process pool. Returns the per-frame
+    corner indices, the frames without a border and border text samples.
+    With ``reveal_payload`` (the first segment) it also collects the payload
+    chunks from the leading frames; ``payload_open`` says they ran on past
+    the end of the segment.
+    """
+    import cv2
+    from PIL import Image
+    from stegano import lsb
+
+    result = {"start": start, "end": end, "corners": [], "unbordered": [], "border_texts": [],
+              "chunks": {}, "payload_open": False, "frames_read": 0}
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        # Payload chunks fill consecutive frames from the start, so only keep
+        # revealing while every frame so far held one
+        scanning_payload = reveal_payload
+        for frame_number in range(start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            result["frames_read"] += 1
+
+            located = decode_corner_data(frame, border_width)
+            result["corners"].append((frame_number, located[0] if located else None))
+            if detect_border_in_frame(frame):
+                if (frame_number - start) % BORDER_TEXT_EVERY == 0:
+                    text = decode_border_data(frame, border_width)
+                    if text:
+                        result["border_texts"].append((frame_number, text))
+            else:
+                result["unbordered"].append(frame_number)
+
+            if scanning_payload:
+                try:
+                    chunk = parse_chunk(lsb.reveal(Image.fromarray(frame[:, :, ::-1])))
+                except Exception:
+                    chunk = None
+                if chunk is None:
+                    scanning_payload = False
+                else:
+                    seq, _, data = chunk
+                    result["chunks"][seq] = data
+        result["payload_open"] = scanning_payload
+    finally:
+        cap.release()
+    return result
+
+def _read_remaining_chunks(video_path, start, chunks):
+    """Carry on a payload that ran past the first segment, frame by frame"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frame_number = start
+        while True:
+            chunk = parse_chunk(reveal_video_frame(cap, frame_number))
+            if chunk is None:
+                return
+            seq, total, data = chunk
+            chunks[seq] = data
+            if len(chunks) >= total:
+                return
+            frame_number += 1
+    finally:
+        cap.release()
+
+def _frame_ranges(frame_numbers):
+    """Collapse sorted frame numbers into [first, last] ranges"""
+    ranges = []
+    for number in frame_numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ranges
+
+def find_splices(corners):
+    """Frames whose corner index doesn't follow on from the previous frame.
+
+    The appended metadata frame is a copy of frame 0 and is not reported.
+    """
+    splices = []
+    previous = None
+    for position, (frame_number, original) in enumerate(corners):
+        if original is None:
+            continue
+        if previous is not None and original != previous + 1:
+            is_metadata_frame = original == 0 and position == len(corners) - 1
+            if not is_metadata_frame:
+                splices.append({"frame": frame_number, "expected": previous + 1, "found": original})
+        previous = original
+    return splices
+
+def _pool(workers):
+    """Process pool normally; threads inside daemonic pool workers (the CLI),
+    which may not start processes of their own"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+def decode_video_segmented(video_path, work_dir, config=None, workers=None):
+    """Verify every frame of a video in parallel segments and decode its payload.
+
+    Returns the same ``border_data``/``stego_data`` fields as
+    ``decode_video_file`` plus a ``verification`` report.
+    """
+    config = config or default_config()
+    os.makedirs(work_dir, exist_ok=True)
+    budget = cpu_budget(config)
+    # Ask for half the budget unless told otherwise, so encodes sharing it
+    # aren't queued behind a long scan; run only as many workers as granted
+    requested = workers or config.decode_workers or max(budget.total_threads // 2, 1)
+
+    # Planned before the reservation: the probe takes a thread of its own,
+    # which a pool holding the whole budget would never give back
+    segments = plan_segments(video_path, requested * SEGMENTS_PER_WORKER, config)
+
+    with budget.reserve(requested) as pool_size:
+        if pool_size < requested:
+            print(f"[INFO] CPU budget allows {pool_size} of {requested} decode workers")
+        print(f"[INFO] Scanning {len(segments)} segments with {pool_size} workers")
+        with _pool(pool_size) as pool:
+            futures = [pool.submit(scan_segment, video_path, start, end, config.border_width, start == 0)
+                       for start, end in segments]
+            results = sorted((future.result() for future in futures), key=lambda r: r["start"])
+
+    # Merge in frame order
+    corners = [corner for r in results for corner in r["corners"]]
+    unbordered = [number for r in results for number in r["unbordered"]]
+    border_texts = [text for r in results for text in r["border_texts"]]
+    chunks = dict(results[0]["chunks"]) if results else {}
+    if results and results[0]["payload_open"] and len(results) > 1:
+        _read_remaining_chunks(video_path, results[0]["end"], chunks)
+
+    frames_read = sum(r["frames_read"] for r in results)
+    verification = {
+        "frames": frames_read,
+        "segments": len(segments),
+        "workers": pool_size,
+        "indexed_frames": sum(1 for _, original in corners if original is not None),
+        "unbordered_frames": _frame_ranges(unbordered),
+        "splices": find_splices(corners),
+    }
+    for r in results:
+        if r["frames_read"] < r["end"] - r["start"]:
+            verification.setdefault("unreadable_frames", []).append([r["start"] + r["frames_read"], r["end"] - 1])
+
+    result = {"verification": verification}
+    border_data = pick_border_text(border_texts) if border_texts else None
+    if border_data:
+        result["border_data"] = border_data
+
+    if chunks:
+        payload = join_chunks(chunks)
+        if payload is None:
+            print(f"[WARNING] Only found chunks {sorted(chunks)}")
+            payload = "".join(chunks[seq] for seq in sorted(chunks))
+        try:
+            result["stego_data"] = decrypt_rsa(payload, config).decode('utf-8')
+        except Exception as e:
+            print(f"Error decrypting message: {e}")
+    else:
+        # Videos from before chunk headers: the metadata-frame path
+        stego_data = decode_video(video_path, work_dir, config, border_data=border_data or "")
+        if stego_data:
+            result["stego_data"] = stego_data
+    return result
@@ -0,0 +1,208 @@
+"""Smart rendering for payload-only encode jobs.
+
+Without the border stage, only the first few frames (the payload chunks) and
+the appended metadata frame change. Instead of rebuilding and transcoding
+the whole video, this re-encodes just the GOPs that contain those frames
+and stream-copies every other GOP from the source:
+
+    [frames 0..k-1, re-encoded] + [keyframe k..end, copied] + [metadata frame]
+
+Encode time then depends on the payload size, not the video length. The
+copied GOPs are only compatible with our libx264 segments when the source is
+H.264, so other codecs return None; the job then fails, because a full
+render's lossy MP4 can't carry a payload-only encode.
+
+The re-encoded frames carry the LSB payload, so they are encoded losslessly
+in RGB (libx264rgb, High 4:4:4); a YUV 4:2:0 encode would destroy it. Some
+hardware decoders can't play 4:4:4, which is the price of a playable
+payload-only output without a full transcode.
+
+The segments are joined with a plain MP4 stream copy only when the libx264
+head has the same SPS/PPS (profile, level, chroma format, ...) and time base
+as the source. Otherwise, which is usual for phone footage, every segment is
+first remuxed to MPEG-TS with its parameter sets inside the stream, so the
+decoder re-initialises at each join. Either way the result is checked
+without decoding all of it: the packet count must be the source's plus one,
+and the payload frames, the frames either side of each join and the metadata
+frame must decode to exactly what was meant to be there, or None is returned.
+"""
+import os
+
+from .chunker import chunk_payload, lsb_capacity
+from .config import default_config
+from .crypto import encrypt_rsa
+from .ffmpeg import (
+    probe_video_packets,
+    read_parameter_sets,
+    probe_colour,
+    encode_raw_frames,
+    stream_copy_segment,
+    remux_annexb,
+    concat_segments,
+)
+from .scheduler import cpu_budget
+from .spool import FrameSpool
+from .video import encode_frames
+
+# Container for segments joined with in-band parameter sets
+ANNEXB_EXTENSION = '.ts'
+
+
+def find_cut_point(packets, first_untouched_frame):
+    """Return the index of the first keyframe at or after a frame, or None"""
+    for index in range(first_untouched_frame, len(packets)):
+        if packets[index][2]:
+            return index
+    return None
+
+def streams_match(head_path, video_path, info, config=None):
+    """Whether the re-encoded head can be stream-copied next to the source GOPs"""
+    head_info = probe_video_packets(head_path, config)
+    if not head_info or head_info["time_base"] != info["time_base"]:
+        return False
+    head_sets = read_parameter_sets(head_path, config)
+    return head_sets is not None and head_sets == read_parameter_sets(video_path, config)
+
+def _read_frame(cap, index):
+    import cv2
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+    success, image = cap.read()
+    return image if success else None
+
+def check_smart_render(output_path, expected, frame_count, config=None):
+    """Why a smart-rendered file is unusable, or None if it checks out.
+
+    ``expected`` maps output frame numbers to the exact BGR frame that must
+    decode there; only those frames (and their GOPs) are decoded.
+    """
+    import cv2
+    import numpy as np
+
+    out_info = probe_video_packets(output_path, config)
+    packets = len(out_info["packets"]) if out_info else 0
+    if packets != frame_count:
+        return f"{packets} video packets, expected {frame_count}"
+
+    # Taken after the probe, which reserves a thread of its own
+    with cpu_budget(config).reserve():
+        cap = cv2.VideoCapture(output_path)
+        try:
+            position = None
+            for index in sorted(expected):
+                # Read straight on where possible; seeking restarts at a keyframe
+                if index == position:
+                    success, image = cap.read()
+                    image = image if success else None
+                else:
+                    image = _read_frame(cap, index)
+                position = index + 1
+                if image is None or not np.array_equal(image, expected[index]):
+                    return f"frame {index} does not decode to the expected image"
+        finally:
+            cap.release()
+    return None
+
+def smart_encode_video(video_path, text, work_dir, config=None):
+    """Hide text without borders, re-encoding only the GOPs that change.
+
+    Returns the MP4 path, or None when the source can't be smart-rendered.
+    """
+    import cv2
+
+    config = config or default_config()
+    os.makedirs(work_dir, exist_ok=True)
+
+    info = probe_video_packets(video_path, config)
+    if not info or not info["packets"]:
+        return None
+    if info["codec"] != 'h264':
+        print(f"[INFO] Smart render needs an H.264 source, got {info['codec']}")
+        return None
+
+    packets = info["packets"]
+    width, height = info["width"], info["height"]
+    timescale = info["time_base"][1] // max(info["time_base"][0], 1)
+
+    # Work out how many leading frames the payload occupies, then where the
+    # next GOP starts; everything from there on can be copied untouched
+    encrypted_text = encrypt_rsa(text, config)
+    num_chunks = len(chunk_payload(encrypted_text, lsb_capacity(width, height), max_chunks=len(packets)))
+    cut = find_cut_point(packets, num_chunks)
+    if cut is None:
+        print("[INFO] No keyframe after the payload frames, smart render not possible")
+        return None
+    print(f"[INFO] Smart render: re-encoding frames 0-{cut - 1}, copying {len(packets) - cut} frames")
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    head = None
+    try:
+        with cpu_budget(config).reserve():
+            for _ in range(cut):
+                success, image = cap.read()
+                if not success:
+                    return None
+                if head is None:
+                    head = FrameSpool(os.path.join(work_dir, "head.raw"), image.shape, cut + 1)
+                head.append(image)
+            # Source frames either side of the copied GOPs, to check the joins
+            success, first_copied = cap.read()
+            last_copied = _read_frame(cap, len(packets) - 1)
+            cap.release()
+            if not success or last_copied is None:
+                return None
+
+            # Same chunk and metadata layout as the full render
+            encode_frames(head, encrypted_text, work_dir)
+
+        base_name = os.path.basename(video_path).rsplit('.', 1)[0]
+        head_path = os.path.join(work_dir, "segment_head.mp4")
+        middle_path = os.path.join(work_dir, "segment_middle.mp4")
+        tail_path = os.path.join(work_dir, "segment_tail.mp4")
+        output_path = os.path.join(work_dir, f"encoded_{base_name}.mp4")
+
+        seconds = info["time_base"][0] / info["time_base"][1]
+        start_seconds = packets[cut][0] * seconds
+        end_pts = packets[-1][0] + packets[-1][1]
+        durations = [(packets[cut][0] - packets[0][0]) * seconds,
+                     (end_pts - packets[cut][0]) * seconds,
+                     packets[-1][1] * seconds]
+        segments = [
+            encode_raw_frames((head[i] for i in range(cut)), width, height, fps, head_path, timescale, config,
+                              lossless=True),
+            stream_copy_segment(video_path, start_seconds, middle_path, timescale, config),
+            encode_raw_frames([head[cut]], width, height, fps, tail_path, timescale, config, lossless=True),
+        ]
+        if not all(segments):
+            return None
+        if not streams_match(head_path, video_path, info, config):
+            print("[INFO] Encoder settings differ from the source, joining the segments as MPEG-TS")
+            # The RGB head declares the GBR matrix; pin the source's own on
+            # the copied GOPs so the decoder doesn't keep using it there
+            colour = probe_colour(video_path, config)
+            if colour is None:
+                print("[INFO] Unknown source colour space, smart render not possible")
+                return None
+            segments = [remux_annexb(path, path.rsplit('.', 1)[0] + ANNEXB_EXTENSION, config,
+                                     colour if path == middle_path else None)
+                        for path in segments]
+            if not all(segments):
+                return None
+        if not concat_segments(segments, video_path, output_path, config, durations):
+            return None
+
+        # Every re-encoded frame must be bit-exact (that's where the payload
+        # is), the copied GOPs must start and end with the source's frames,
+        # and the metadata frame must come last
+        expected = {index: head[index] for index in range(cut)}
+        expected.update({cut: first_copied, len(packets) - 1: last_copied, len(packets): head[cut]})
+        problem = check_smart_render(output_path, expected, len(packets) + 1, config)
+        if problem:
+            print(f"[WARNING] Smart render output is unusable: {problem}")
+            return None
+        return output_path
+    finally:
+        cap.release()
+        if head is not None:
+            head.close()
@@ -0,0 +1,83 @@
+"""Disk-backed spool of raw video frames.
+
+Stages that need random access to frames (the metadata frame reuses frame 0,
+``create_output_video`` re-reads everything) can keep the decoded frames in a
+single ``np.memmap`` file instead of one PNG per frame. Frames are written
+once as raw uint8 arrays, later stages get zero-copy views, and the OS page
+cache decides what actually stays in RAM.
+"""
+import os
+
+
+class FrameSpool:
+    """Fixed-shape uint8 frames stored back to back in one memory-mapped file"""
+
+    def __init__(self, path, frame_shape, capacity=16):
+        import numpy as np
+
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self._frame_bytes = int(np.prod(self.frame_shape))
+        self._capacity = max(int(capacity), 1)
+        self._length = 0
+        self._map = np.memmap(path, dtype=np.uint8, mode='w+',
+                              shape=(self._capacity,) + self.frame_shape)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def __getitem__(self, index):
+        """Return a zero-copy view of a frame"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"Frame {index} is not in the spool")
+        return self._map[index]
+
+    def __setitem__(self, index, frame):
+        """Overwrite a frame in place"""
+        self[index][...] = frame
+
+    def append(self, frame):
+        """Copy a frame into the spool and return its index"""
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match spool shape {self.frame_shape}")
+        if self._length == self._capacity:
+            self._grow(self._capacity * 2)
+        self._map[self._length] = frame
+        self._length += 1
+        return self._length - 1
+
+    def _grow(self, capacity):
+        """Extend the backing file and remap it.
+
+        Views handed out before the remap keep pointing at the old mapping,
+        which stays valid because the file only ever gets longer.
+        """
+        import numpy as np
+
+        self._map.flush()
+        with open(self.path, 'r+b') as spool_file:
+            spool_file.truncate(capacity * self._frame_bytes)
+        self._capacity = capacity
+        self._map = np.memmap(self.path, dtype=np.uint8, mode='r+',
+                              shape=(self._capacity,) + self.frame_shape)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self, remove=True):
+        """Drop the mapping and (by default) delete the backing file"""
+        self._map.flush()
+        self._map = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def is_spool(frames):
+    """True if frames is a FrameSpool rather than a list of PNG paths"""
+    return isinstance(frames, FrameSpool)
@@ -0,0 +1,366 @@
+"""Resumable chunked uploads.
+
+A large video can be sent in pieces that survive dropped connections:
+
+1. ``create_upload`` registers the file name and total length and returns an
+   upload id;
+2. ``append_chunk`` writes bytes at the current offset (a retry first asks
+   ``upload_status`` for the offset and resends only what's missing);
+   ``open_chunk`` does the same for a body that arrives piece by piece;
+3. ``finalize_upload`` checks the length and the SHA-256 and moves the file
+   into place, after which ``resolve_upload`` hands its path to the normal
+   encode/decode pipeline.
+
+Each upload lives in ``<upload_folder>/<upload_id>/`` as ``data.part`` plus a
+``meta.json``. The file size on disk is the offset, so nothing is lost if the
+server restarts. The SHA-256 is updated as chunks arrive; the running hash is
+kept in memory per process and rebuilt from ``data.part`` whenever it's
+missing (restart, another worker) or out of step with the file.
+
+Appends and finalizing take a thread lock and then an ``flock`` on
+``data.part``, so server workers in separate processes can't interleave
+chunks of the same upload; the offset is checked only once both are held.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; appends are then serialised per process only
+    fcntl = None
+
+from .config import default_config
+
+DATA_NAME = 'data.part'
+META_NAME = 'meta.json'
+READ_SIZE = 1024 * 1024
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# upload_id -> (offset, sha256 object) for the running hashes
+_hashers = {}
+# upload_id -> lock serialising appends within this process
+_locks = {}
+_state_lock = threading.Lock()
+
+
+class ResumableUploadError(Exception):
+    """A request the upload protocol can't satisfy; carries the HTTP status"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def upload_status_headers(status):
+    """Upload-Offset/Upload-Length headers for an upload status response"""
+    return {
+        'Upload-Offset': str(status["offset"]),
+        'Upload-Length': str(status["length"]),
+    }
+
+def upload_error_body(error):
+    """(JSON body, headers) for a ResumableUploadError, with the offset to resume from"""
+    body = {"error": str(error)}
+    headers = {}
+    if error.offset is not None:
+        body["offset"] = error.offset
+        headers['Upload-Offset'] = str(error.offset)
+    return body, headers
+
+
+def _upload_dir(upload_id, config):
+    if not _UPLOAD_ID.match(upload_id or ''):
+        raise ResumableUploadError("Unknown upload", 404)
+    return os.path.join(config.upload_folder, upload_id)
+
+def _read_meta(upload_dir):
+    try:
+        with open(os.path.join(upload_dir, META_NAME)) as meta_file:
+            return json.load(meta_file)
+    except FileNotFoundError:
+        raise ResumableUploadError("Unknown upload", 404)
+
+def _write_meta(upload_dir, meta):
+    # Write then rename so a crash never leaves half a meta.json behind
+    tmp_path = os.path.join(upload_dir, META_NAME + '.tmp')
+    with open(tmp_path, 'w') as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(tmp_path, os.path.join(upload_dir, META_NAME))
+
+def _stored_name(filename):
+    """Safe on-disk name for the finished file, keeping its extension"""
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', os.path.basename(filename)).lstrip('.')
+    if not name or name in (DATA_NAME, META_NAME, META_NAME + '.tmp'):
+        name = 'video' + os.path.splitext(filename)[1].lower()
+    return name
+
+def _upload_lock(upload_id):
+    with _state_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+def _forget(upload_id):
+    with _state_lock:
+        _hashers.pop(upload_id, None)
+        _locks.pop(upload_id, None)
+
+def _lock_file(data_file):
+    """Block until this process holds the exclusive lock on an open data.part"""
+    if fcntl is not None:
+        fcntl.flock(data_file.fileno(), fcntl.LOCK_EX)
+
+def _running_hash(upload_id, data_path, offset):
+    """The SHA-256 of the first ``offset`` bytes, rebuilt from disk if needed"""
+    state = _hashers.get(upload_id)
+    if state is not None and state[0] == offset:
+        return state[1]
+    hasher = hashlib.sha256()
+    with open(data_path, 'rb') as data_file:
+        remaining = offset
+        while remaining:
+            block = data_file.read(min(READ_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    _hashers[upload_id] = (offset, hasher)
+    return hasher
+
+
+def create_upload(filename, length, sha256=None, config=None):
+    """Register a new upload and return its status"""
+    config = config or default_config()
+    try:
+        length = int(length)
+    except (TypeError, ValueError):
+        raise ResumableUploadError("Upload length must be an integer")
+    if length <= 0:
+        raise ResumableUploadError("Upload length must be positive")
+    if length > config.max_upload_size:
+        raise ResumableUploadError(f"Upload length {length} exceeds the limit of "
+                                   f"{config.max_upload_size} bytes", 413)
+    if not filename:
+        raise ResumableUploadError("Missing file name")
+
+    purge_expired_uploads(config)
+    upload_id = uuid.uuid4().hex
+    upload_dir = os.path.join(config.upload_folder, upload_id)
+    os.makedirs(upload_dir)
+    open(os.path.join(upload_dir, DATA_NAME), 'wb').close()
+    _write_meta(upload_dir, {
+        "filename": filename,
+        "length": length,
+        "sha256": sha256.lower() if sha256 else None,
+        "created": time.time(),
+        "path": None,
+    })
+    return upload_status(upload_id, config)
+
+def upload_status(upload_id, config=None):
+    """Current offset, length and state of an upload"""
+    config = config or default_config()
+    upload_dir = _upload_dir(upload_id, config)
+    meta = _read_meta(upload_dir)
+    finalized = meta["path"] is not None
+    offset = meta["length"] if finalized else os.path.getsize(os.path.join(upload_dir, DATA_NAME))
+    return {
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "length": meta["length"],
+        "offset": offset,
+        "finalized": finalized,
+        "sha256": meta["sha256"] if finalized else None,
+    }
+
+class ChunkWriter:
+    """Appends to one upload while holding its locks; made by ``open_chunk``"""
+
+    def __init__(self, upload_id, data_file, offset, length, hasher, lock):
+        self.upload_id = upload_id
+        self.offset = offset
+        self._length = length
+        self._hasher = hasher
+        self._lock = lock
+        self._file = data_file
+
+    def write(self, block):
+        if not block:
+            return
+        if self.offset + len(block) > self._length:
+            raise ResumableUploadError("Chunk runs past the declared upload length", 413, self.offset)
+        self._file.write(block)
+        self._hasher.update(block)
+        self.offset += len(block)
+
+    def close(self):
+        """Keep what was written, release the upload; returns the new offset"""
+        if self._file is None:
+            return self.offset
+        try:
+            # Closing also drops the flock
+            self._file.close()
+        finally:
+            self._file = None
+            # Whatever reached the file is part of the upload now
+            _hashers[self.upload_id] = (self.offset, self._hasher)
+            self._lock.release()
+        return self.offset
+
+def open_chunk(upload_id, offset, config=None):
+    """Start appending at ``offset``; returns a ChunkWriter that must be closed.
+
+    ``offset`` must equal the bytes already stored, otherwise a 409 error
+    carrying the current offset is raised before any data is read, so a
+    server can reject a misplaced chunk without receiving its body.
+    """
+    config = config or default_config()
+    upload_dir = _upload_dir(upload_id, config)
+    data_path = os.path.join(upload_dir, DATA_NAME)
+
+    lock = _upload_lock(upload_id)
+    lock.acquire()
+    data_file = None
+    try:
+        try:
+            # No O_CREAT: once finalized, data.part is gone and must stay gone
+            data_file = os.fdopen(os.open(data_path, os.O_WRONLY | os.O_APPEND), 'ab')
+        except FileNotFoundError:
+            pass
+        else:
+            _lock_file(data_file)
+        # Read the state only under the flock; another process may have
+        # appended or finalized while this one waited
+        meta = _read_meta(upload_dir)
+        if meta["path"] is not None:
+            raise ResumableUploadError("Upload is already finalized", 409, meta["length"])
+        if data_file is None:
+            raise ResumableUploadError("Unknown upload", 404)
+        current = os.fstat(data_file.fileno()).st_size
+        if offset != current:
+            raise ResumableUploadError(f"Offset {offset} does not match the upload offset {current}",
+                                       409, current)
+        hasher = _running_hash(upload_id, data_path, current)
+        return ChunkWriter(upload_id, data_file, current, meta["length"], hasher, lock)
+    except BaseException:
+        if data_file is not None:
+            data_file.close()
+        lock.release()
+        raise
+
+def append_chunk(upload_id, offset, chunks, config=None):
+    """Write an iterable of byte blocks at ``offset``; returns the new offset.
+
+    Blocks written before a broken connection are kept, so the client
+    resumes from wherever it got to.
+    """
+    writer = open_chunk(upload_id, offset, config)
+    try:
+        for block in chunks:
+            writer.write(block)
+    finally:
+        writer.close()
+    return writer.offset
+
+def finalize_upload(upload_id, sha256=None, config=None):
+    """Verify a complete upload and move it into place; returns its status"""
+    config = config or default_config()
+    upload_dir = _upload_dir(upload_id, config)
+    data_path = os.path.join(upload_dir, DATA_NAME)
+
+    with _upload_lock(upload_id):
+        try:
+            data_file = open(data_path, 'rb')
+        except FileNotFoundError:
+            # Already finalized (or deleted); meta.json says which
+            data_file = None
+        try:
+            if data_file is not None:
+                _lock_file(data_file)
+            meta = _read_meta(upload_dir)
+            if meta["path"] is not None:
+                return upload_status(upload_id, config)
+            if data_file is None:
+                raise ResumableUploadError("Unknown upload", 404)
+            size, digest = _finalize_locked(upload_id, upload_dir, data_path, data_file, meta, sha256)
+        finally:
+            if data_file is not None:
+                data_file.close()
+    with _state_lock:
+        _hashers.pop(upload_id, None)
+    print(f"[INFO] Upload {upload_id} finalized ({size} bytes, sha256 {digest})")
+    return upload_status(upload_id, config)
+
+def _finalize_locked(upload_id, upload_dir, data_path, data_file, meta, sha256):
+    """Check and move a complete data.part while its locks are held"""
+    size = os.fstat(data_file.fileno()).st_size
+    if size != meta["length"]:
+        raise ResumableUploadError(f"Upload is incomplete: {size} of {meta['length']} bytes",
+                                   409, size)
+    digest = _running_hash(upload_id, data_path, size).hexdigest()
+    expected = (sha256 or meta["sha256"] or '').lower()
+    if expected and expected != digest:
+        raise ResumableUploadError("SHA-256 mismatch, the upload is corrupt", 422, size)
+
+    video_path = os.path.join(upload_dir, _stored_name(meta["filename"]))
+    os.replace(data_path, video_path)
+    meta.update(path=video_path, sha256=digest)
+    _write_meta(upload_dir, meta)
+    return size, digest
+
+def resolve_upload(upload_id, config=None):
+    """Path of a finalized upload, for handing to the encode/decode pipeline"""
+    config = config or default_config()
+    upload_dir = _upload_dir(upload_id, config)
+    meta = _read_meta(upload_dir)
+    if meta["path"] is None:
+        raise ResumableUploadError("Upload is not finalized", 409)
+    # Using an upload counts as activity, so it isn't purged while in use
+    os.utime(os.path.join(upload_dir, META_NAME))
+    return meta["path"]
+
+def delete_upload(upload_id, config=None):
+    """Remove an upload and everything stored for it"""
+    config = config or default_config()
+    upload_dir = _upload_dir(upload_id, config)
+    if not os.path.isdir(upload_dir):
+        raise ResumableUploadError("Unknown upload", 404)
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    _forget(upload_id)
+
+def _last_activity(upload_dir):
+    """Latest mtime in an upload: appends touch data.part, finalizing and
+    resolve_upload touch meta.json"""
+    last = os.path.getmtime(upload_dir)
+    for name in os.listdir(upload_dir):
+        try:
+            last = max(last, os.path.getmtime(os.path.join(upload_dir, name)))
+        except FileNotFoundError:
+            continue
+    return last
+
+def purge_expired_uploads(config=None):
+    """Delete uploads unused for more than ``config.upload_ttl`` seconds"""
+    config = config or default_config()
+    if config.upload_ttl <= 0 or not os.path.isdir(config.upload_folder):
+        return
+    cutoff = time.time() - config.upload_ttl
+    for upload_id in os.listdir(config.upload_folder):
+        upload_dir = os.path.join(config.upload_folder, upload_id)
+        if not _UPLOAD_ID.match(upload_id) or not os.path.isdir(upload_dir):
+            continue
+        try:
+            expired = _last_activity(upload_dir) < cutoff
+        except FileNotFoundError:
+            # Deleted meanwhile
+            continue
+        if expired:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            _forget(upload_id)
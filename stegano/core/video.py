@@ -0,0 +1,358 @@
+"""Frame extraction, LSB encoding/decoding and video reassembly."""
+import os
+import re
+import shutil
+
+from .border import decode_corner_data, extract_border_data
+from .chunker import chunk_payload, join_chunks, lsb_capacity, parse_chunk
+from .config import default_config
+from .crypto import decrypt_rsa
+from .spool import FrameSpool, is_spool
+
+# Frame numbers hidden in the metadata frame, e.g. "0" or "0,1,2"
+_METADATA = re.compile(r'^\d+(,\d+)*$')
+# Frames read from the start to find a corner index when no sampled frames
+# are at hand
+PROBE_FRAMES = 60
+
+
+# Video processing functions
+def extract_frames(video_path, temp_dir, spool=False):
+    """Extract frames from video.
+
+    By default every frame is written as a PNG and a list of paths is
+    returned. With ``spool=True`` the raw frames go into a single
+    memory-mapped FrameSpool instead, which skips PNG encode/decode.
+    """
+    import cv2
+
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir)
+    
+    print(f"[INFO] Extracting frames from video {video_path}")
+    vidcap = cv2.VideoCapture(video_path)
+    # One spare slot for the metadata frame appended by encode_frames
+    expected_frames = max(int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT)), 0) + 1
+    count = 0
+    frames = []
+    
+    while True:
+        success, image = vidcap.read()
+        if not success:
+            break
+        if spool:
+            if count == 0:
+                frames = FrameSpool(os.path.join(temp_dir, "frames.raw"), image.shape, expected_frames)
+            frames.append(image)
+        else:
+            frame_path = os.path.join(temp_dir, f"{count}.png")
+            cv2.imwrite(frame_path, image)
+            frames.append(frame_path)
+        count += 1
+    vidcap.release()
+    
+    print(f"[INFO] Extracted {count} frames from video")
+    return frames, count
+
+def load_frame(frames, index):
+    """Return frame ``index`` as a BGR array from a spool or a list of PNG paths"""
+    if is_spool(frames):
+        return frames[index]
+    import cv2
+    return cv2.imread(frames[index])
+
+def hide_in_frame(frames, index, message):
+    """Hide a message in one frame with LSB steganography, in place"""
+    from stegano import lsb
+
+    if is_spool(frames):
+        import numpy as np
+        from PIL import Image
+
+        # stegano works on RGB PIL images, spooled frames are BGR arrays
+        secret_enc = lsb.hide(Image.fromarray(frames[index][:, :, ::-1]), message)
+        frames[index] = np.asarray(secret_enc)[:, :, ::-1]
+    else:
+        secret_enc = lsb.hide(frames[index], message)
+        secret_enc.save(frames[index])
+
+def encode_frames(frames, encrypted_text, temp_dir):
+    """Encode encrypted text into frames"""
+    # Convert to string if it's bytes
+    if isinstance(encrypted_text, bytes):
+        encrypted_text = encrypted_text.decode('utf-8')
+        
+    # Pack the text into as few frames as their LSB capacity allows
+    height, width = load_frame(frames, 0).shape[:2]
+    chunk_list = chunk_payload(encrypted_text, lsb_capacity(width, height), max_chunks=len(frames))
+    
+    # Use the first N frames (N = number of chunks)
+    frame_numbers = list(range(len(chunk_list)))
+    
+    print(f"Encoding text into {len(frame_numbers)} frames")
+    
+    # Hide text chunks in frames
+    for frame_num, chunk in zip(frame_numbers, chunk_list):
+        # Hide text in frame using LSB steganography
+        hide_in_frame(frames, frame_num, chunk)
+        print(f"[INFO] Frame {frame_num} holds {chunk[:40]}...")
+    
+    # Save the frame numbers in a special metadata frame
+    # This will help with faster decryption
+    # The metadata frame starts as a copy of the first frame
+    if is_spool(frames):
+        frames.append(frames[0])
+    else:
+        metadata_frame_path = os.path.join(temp_dir, "metadata.png")
+        shutil.copyfile(frames[0], metadata_frame_path)
+        # Insert the metadata frame as the last frame to process
+        frames.append(metadata_frame_path)
+    
+    # Save frame numbers as metadata
+    metadata_content = ",".join(map(str, frame_numbers))
+    hide_in_frame(frames, len(frames) - 1, metadata_content)
+    print(f"[INFO] Metadata frame holds frame numbers: {metadata_content}")
+        
+    return frame_numbers
+
+def create_output_video(frames, original_video, output_path):
+    """Create output video from frames"""
+    import cv2
+
+    # Get video properties
+    video = cv2.VideoCapture(original_video)
+    fps = video.get(cv2.CAP_PROP_FPS)
+    width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    
+    # Ensure output path ends with .mov
+    if not output_path.endswith('.mov'):
+        output_path = output_path.rsplit('.', 1)[0] + '.mov'
+    
+    # Create video writer with PNG codec for MOV container
+    # This preserves image quality better for steganography
+    fourcc = cv2.VideoWriter_fourcc(*'png ')  # PNG codec with MOV container
+    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    
+    # Add frames to video
+    for index in range(len(frames)):
+        frame = load_frame(frames, index)
+        if frame is not None:
+            out.write(frame)
+    
+    out.release()
+    print(f"[INFO] Created output video: {output_path}")
+    return output_path
+
+def reveal_video_frame(cap, frame_number):
+    """Read one frame from an open capture and return its LSB message, if any"""
+    import cv2
+    from PIL import Image
+    from stegano import lsb
+
+    # Only seek when not already positioned on the frame; seeking is costly
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_number:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+    ret, frame = cap.read()
+    if not ret:
+        print(f"[ERROR] Could not read frame {frame_number}")
+        return None
+    
+    try:
+        return lsb.reveal(Image.fromarray(frame[:, :, ::-1]))
+    except Exception:
+        return None
+
+def locate_frame_offset(cap, border_width=20, corner_samples=None, max_probe=PROBE_FRAMES):
+    """Find how far frame numbers moved since encoding, from the corner index.
+
+    ``corner_samples`` are (frame index, original index, total frames) for
+    frames sampled across the clip, as collected by ``extract_border_data``.
+    The earliest one decides, being the closest to the payload frames.
+    Without samples the video is read from the start, past leading frames
+    that carry no index, for up to ``max_probe`` frames.
+
+    Returns ``(offset, total_frames)``, where ``offset`` is what to subtract
+    from an original frame number to get its position in this video, or
+    None when no frame has a corner index (borderless or foreign videos).
+    """
+    import cv2
+
+    if corner_samples is None:
+        corner_samples = []
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for frame_number in range(max_probe):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            located = decode_corner_data(frame, border_width)
+            if located is not None:
+                corner_samples.append((frame_number,) + located)
+                break
+    if not corner_samples:
+        return None
+
+    frame_number, original_index, total_frames = min(corner_samples)
+    offset = original_index - frame_number
+    print(f"[INFO] Frame {frame_number} was frame {original_index} of {total_frames} "
+          f"when encoded (offset {offset})")
+    return offset, total_frames
+
+def _decode_legacy_frames(cap, number_of_frames, metadata_frame=None, offset=0):
+    """Decode the frames the metadata frame lists (or the first 15 without one).
+
+    Covers videos written before chunk headers, and chunked videos whose
+    first payload frame wasn't where the chunk scan looked.
+    """
+    # First check if there's a metadata frame by looking at the last frames
+    metadata_frame_numbers = []
+    
+    # The corner index says exactly where the metadata frame went, otherwise
+    # check the last 5 frames for it
+    print("[INFO] Looking for metadata frame...")
+    if metadata_frame is not None and 0 <= metadata_frame < number_of_frames:
+        candidates = [metadata_frame]
+    else:
+        candidates = range(max(0, number_of_frames - 5), number_of_frames)
+    for frame_index in candidates:
+        metadata_content = reveal_video_frame(cap, frame_index)
+        # "0" for a single chunk, "0,1,2" for several
+        if metadata_content and _METADATA.match(metadata_content):
+            frame_nums = [int(num) - offset for num in metadata_content.split(',')]
+            metadata_frame_numbers = frame_nums
+            print(f"[INFO] Using frame numbers from metadata frame {frame_index}: {frame_nums}")
+            break
+    
+    # Frames to check - either from metadata or first 15 frames if no metadata
+    frames_to_check = metadata_frame_numbers if metadata_frame_numbers else list(range(15))
+    print(f"[INFO] Will check these frames: {frames_to_check}")
+    
+    # Process frames - using targeted frame extraction if metadata is available
+    decoded, chunks = _reveal_frames(cap, number_of_frames, frames_to_check)
+    if metadata_frame_numbers and not decoded and not chunks:
+        # Frames were added in front of a video without a corner index
+        print("[INFO] Nothing in the listed frames, checking the first 15")
+        decoded, chunks = _reveal_frames(cap, number_of_frames, range(15))
+    
+    if chunks:
+        return _join_found_chunks(chunks)
+    
+    # Arrange the message
+    res = ""
+    for fn in sorted(decoded.keys()):
+        res += decoded[fn]
+    return res
+
+def _reveal_frames(cap, number_of_frames, frames_to_check):
+    """Reveal frames; returns legacy messages by frame and chunks by seq"""
+    decoded = {}
+    chunks = {}
+    for frame_number in frames_to_check:
+        if not 0 <= frame_number < number_of_frames:
+            print(f"[WARNING] Frame number {frame_number} is outside the video")
+            continue
+        
+        clear_message = reveal_video_frame(cap, frame_number)
+        if not clear_message:
+            continue
+        # Frames from the chunking encoder carry a seq/total header
+        chunk = parse_chunk(clear_message)
+        if chunk is not None:
+            seq, total, data = chunk
+            chunks[seq] = data
+            print(f"Frame {frame_number} DECODED chunk {seq + 1}/{total}")
+        else:
+            decoded[frame_number] = clear_message
+            print(f"Frame {frame_number} DECODED: {clear_message}")
+    return decoded, chunks
+
+def _join_found_chunks(chunks):
+    """Join chunks, falling back to whatever was found if some are missing"""
+    res = join_chunks(chunks)
+    if res is None:
+        print(f"[WARNING] Only found chunks {sorted(chunks)}")
+        res = "".join(chunks[seq] for seq in sorted(chunks))
+    return res
+
+def decode_video(video_path, temp_dir, config=None, border_data=None, corner_samples=None):
+    """Decode hidden text from video.
+
+    Pass ``border_data`` and ``corner_samples`` when the caller already ran
+    ``extract_border_data``, so the sampled frames aren't read twice.
+    """
+    import cv2
+
+    config = config or default_config()
+    # Create a temporary directory similar to the original code
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir)
+    
+    # Extract frames using OpenCV directly
+    cap = cv2.VideoCapture(video_path)
+    number_of_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    print(f"[INFO] Video has {number_of_frames} frames")
+    
+    # Check for data in borders first, unless the caller already did
+    if border_data is None:
+        corner_samples = []
+        border_data = extract_border_data(video_path, temp_dir, corner_samples, config.border_width)
+    if border_data:
+        print(f"[INFO] Extracted data from borders: {border_data[:30]}...")
+    
+    # The corner index (bordered videos) tells where the original frame 0
+    # ended up after trimming or remuxing
+    offset = 0
+    metadata_frame = None
+    located = locate_frame_offset(cap, config.border_width, corner_samples)
+    if located is not None:
+        offset, total_frames = located
+        # The metadata frame was appended after the last bordered frame
+        metadata_frame = total_frames - offset
+        if offset > 0:
+            print(f"[WARNING] The first {offset} encoded frames were trimmed off")
+    
+    # Chunked payloads start at frame 0 and carry a seq/total header, so
+    # read forward from there and stop as soon as every chunk is in hand
+    chunks = {}
+    for frame_number in range(max(-offset, 0), number_of_frames):
+        chunk = parse_chunk(reveal_video_frame(cap, frame_number))
+        if chunk is None:
+            break
+        seq, total, data = chunk
+        chunks[seq] = data
+        print(f"Frame {frame_number} DECODED chunk {seq + 1}/{total}")
+        if len(chunks) == total:
+            break
+    
+    if chunks:
+        res = _join_found_chunks(chunks)
+    else:
+        res = _decode_legacy_frames(cap, number_of_frames, metadata_frame, offset)
+    cap.release()
+    
+    if not res:
+        return border_data if border_data else None  # If no steganography data found, return border data
+    
+    try:
+        # Try to decrypt the message
+        decrypted_message = decrypt_rsa(res, config)
+        return decrypted_message.decode('utf-8')
+    except Exception as e:
+        print(f"Error decrypting message: {e}")
+        # If decryption fails but we have border data, return that instead
+        if border_data:
+            print(f"[INFO] Returning border data instead: {border_data[:30]}...")
+            return border_data
+        return res  # Otherwise return the encoded message
+
+def count_frames(video_path):
+    """Return the frame count reported by the container (0 if unreadable)"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+    finally:
+        cap.release()